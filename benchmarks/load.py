@@ -0,0 +1,189 @@
+"""
+Drives the AdSel clients against local stand-in servers at a chosen
+concurrency and reports throughput and latency percentiles per operation.
+
+    python benchmarks/load.py [--concurrency 16] [--duration 30]
+                              [--operation applications ...]
+                              [stand-in options, see standin.py]
+
+Each worker thread repeatedly runs a randomly chosen operation through
+live DAOs pointed at the stand-ins.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, OrderedDict
+from commonconf import override_settings
+from commonconf.backends import use_configparser_backend
+from restclients_core.exceptions import DataFailureException
+from uw_adsel import AdSel, AdSelAzureAssign, AdSelAzureMerge
+from uw_adsel.dao import pool_stats
+from uw_adsel.models import CohortAssignment, MajorAssignment, Application
+import standin
+
+
+def applicants():
+    return [Application(adsel_id=adsel_id, system_key=1000 + adsel_id,
+                        application_number=1)
+            for adsel_id in range(1, 101)]
+
+
+def assign_cohorts(clients):
+    return clients['assign'].assign_cohorts_bulk(CohortAssignment(
+        applicants=applicants(), assignment_type="upload", cohort_number=1,
+        override_previous=True, override_protected=False, quarter=0,
+        campus=0, comments="load", user="javerage", workspace_id=1))
+
+
+def assign_majors(clients):
+    return clients['assign'].assign_majors(MajorAssignment(
+        applicants=applicants(), assignment_type="upload",
+        major_code="0_CSE_1", quarter=0, campus=0, comments="load",
+        user="javerage", workspace_id=1))
+
+
+OPERATIONS = OrderedDict([
+    ('quarters', lambda clients: clients['adsel'].get_quarters()),
+    ('applications',
+     lambda clients: clients['adsel'].get_all_applications_by_qtr(0, 1)),
+    ('application_lookup',
+     lambda clients: clients['adsel'].get_applications_by_qtr_adselid_list(
+         0, [54687, 84136, 45743], 1)),
+    ('activities', lambda clients: clients['adsel'].get_activities()),
+    ('cohorts', lambda clients: clients['adsel'].get_cohorts_by_qtr(0)),
+    ('majors', lambda clients: clients['adsel'].get_majors_by_qtr(1, 1)),
+    ('decisions', lambda clients: clients['adsel'].get_decisions(0, 1)),
+    ('workspaces',
+     lambda clients: clients['adsel'].get_workspaces_by_qtr(20194)),
+    ('assign_cohorts', assign_cohorts),
+    ('assign_majors', assign_majors),
+    ('conflict_check',
+     lambda clients: clients['merge'].check_conflict_cohort(1, 2)),
+    ('conflict_details',
+     lambda clients: clients['merge'].get_conflict_details_cohort(1, 2)),
+])
+
+
+def live_settings(servers, pool_size):
+    settings = {}
+    for service, server in servers.items():
+        key = service.upper()
+        settings["RESTCLIENTS_{}_DAO_CLASS".format(key)] = "Live"
+        settings["RESTCLIENTS_{}_HOST".format(key)] = server.url
+        settings["RESTCLIENTS_{}_POOL_SIZE".format(key)] = pool_size
+    return settings
+
+
+class LoadRecorder(object):
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds, error=None):
+        with self._lock:
+            self.latencies[operation].append(seconds)
+            if error is not None:
+                self.errors[operation][error] += 1
+
+
+def percentile(ordered, fraction):
+    if not len(ordered):
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_worker(operations, recorder, deadline, config={}):
+    clients = {'adsel': AdSel(config), 'assign': AdSelAzureAssign(config),
+               'merge': AdSelAzureMerge(config)}
+    while time.monotonic() < deadline:
+        name = random.choice(operations)
+        error = None
+        start = time.perf_counter()
+        try:
+            OPERATIONS[name](clients)
+        except DataFailureException as ex:
+            error = "HTTP {}".format(ex.status)
+        except Exception as ex:
+            error = type(ex).__name__
+        recorder.record(name, time.perf_counter() - start, error)
+
+
+def report(recorder, elapsed):
+    print("{:<20} {:>8} {:>8} {:>9} {:>9} {:>9} {:>9}  {}".format(
+        "operation", "calls", "calls/s", "p50 ms", "p95 ms", "p99 ms",
+        "max ms", "errors"))
+    total = 0
+    for name in OPERATIONS:
+        latencies = sorted(recorder.latencies.get(name, []))
+        if not len(latencies):
+            continue
+        total += len(latencies)
+        errors = ", ".join("{} x{}".format(error, count) for error, count
+                           in sorted(recorder.errors[name].items()))
+        print("{:<20} {:>8} {:>8.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}"
+              "  {}".format(name, len(latencies), len(latencies) / elapsed,
+                            percentile(latencies, 0.5) * 1000,
+                            percentile(latencies, 0.95) * 1000,
+                            percentile(latencies, 0.99) * 1000,
+                            latencies[-1] * 1000, errors))
+    print("{} calls in {:.1f}s, {:.1f} calls/s".format(
+        total, elapsed, total / elapsed))
+
+    print("\n{:<20} {:>8} {:>10} {:>8} {:>8} {:>8} {:>10}".format(
+        "pool", "maxsize", "checkouts", "hits", "new", "waits", "wait s"))
+    for service, stats in sorted(pool_stats().items()):
+        print("{:<20} {:>8} {:>10} {:>8} {:>8} {:>8} {:>10.2f}".format(
+            service, stats['maxsize'], stats['checkouts'], stats['hits'],
+            stats['new_connections'], stats['waits'],
+            stats['wait_seconds']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--operation', action='append',
+                        choices=list(OPERATIONS),
+                        help="run only the named operation; may be repeated")
+    parser.add_argument('--pool-size', type=int,
+                        help="connections per service; default concurrency")
+    parser.add_argument('--prefetch-pages', action='store_true',
+                        help="fetch every page of paginated resources")
+    standin.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # failures are counted in the report rather than logged
+    logging.getLogger("uw_adsel").setLevel(logging.CRITICAL)
+    use_configparser_backend(os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "travis-ci",
+        "test.conf"), 'ADSEL')
+    servers = standin.start_standins(standin.config_from_arguments(args))
+    recorder = LoadRecorder()
+    try:
+        with override_settings(**live_settings(
+                servers, args.pool_size or args.concurrency)):
+            deadline = time.monotonic() + args.duration
+            start = time.monotonic()
+            workers = [threading.Thread(
+                target=run_worker,
+                args=(args.operation or list(OPERATIONS), recorder,
+                      deadline, {'prefetch_pages': args.prefetch_pages}))
+                for _ in range(args.concurrency)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.monotonic() - start
+    finally:
+        standin.stop_standins(servers)
+    report(recorder, elapsed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
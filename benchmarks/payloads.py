@@ -0,0 +1,117 @@
+"""
+Synthetic AdSel payloads and models for benchmarks, sized by row count.
+"""
+import json
+from uw_adsel.models import Application, CohortAssignment, MajorAssignment
+
+__all__ = ['applications_payload', 'activities_payload', 'majors_payload',
+           'conflict_details', 'applicants', 'cohort_assignment',
+           'major_assignment']
+
+
+def applications_payload(rows):
+    return json.dumps([
+        {'admissionsSelectionId': 100000 + i,
+         'applicationNbr': i % 3 + 1,
+         'systemKey': 500000 + i,
+         'campus': 0,
+         'academicQtrKeyId': 20194,
+         'assignedCohort': i % 40 or None,
+         'assignedMajor': 'CSE' if i % 2 else None,
+         'majorProgramCode': '0_CSE_1' if i % 2 else None,
+         'applicationType': 'Freshman',
+         'sdbApplicationStatus': 16}
+        for i in range(rows)]).encode('utf-8')
+
+
+def activities_payload(rows):
+    return json.dumps({
+        'decisions': [
+            {'academicQtrKeyId': 20194,
+             'assignmentMadeOn': "2019-11-14T13:44:49.494Z",
+             'comment': "bulk upload {}".format(i),
+             'assignmentMadeBy': "javerage",
+             'decisionImportID': i,
+             'assignmentType': "upload",
+             'cohortNbr': i % 40,
+             'majorAbbr': None,
+             'majorProgramCode': "",
+             'assignmentCategory': "Cohort",
+             'applicationType': "Freshman",
+             'totalSubmitted': 81,
+             'totalAssigned': 59}
+            for i in range(rows)],
+        'nextPage': "1",
+        'previousPage': "1",
+        'totalCount': 1}).encode('utf-8')
+
+
+def majors_payload(rows):
+    return json.dumps({
+        'majors': [
+            {'majorAbbr': "M{}".format(i),
+             'majorProgramCode': "0_M{}_00".format(i),
+             'academicQtrKeyId': 20194,
+             'majorPathway': 0,
+             'displayName': "Major {}".format(i),
+             'college': "Arts & Sciences",
+             'division': "Sciences",
+             'dtx': "DTX",
+             'assignedCount': i,
+             'internationalCount': 1,
+             'residentCount': 2,
+             'nonResidentCount': 3,
+             'freshmanCount': 4,
+             'transferCount': 5,
+             'postBacCount': 6}
+            for i in range(rows)]}).encode('utf-8')
+
+
+def conflict_details(rows):
+    return [{'admissionsSelectionId': 100000 + i,
+             'applicationNbr': 1,
+             'sdbSrcSystemKey': 500000 + i,
+             'studentName': " Student {} ".format(i),
+             'source_ws': 1,
+             'source_ws_name': "WS 1 ",
+             'destination_ws': 2,
+             'destination_ws_name': "WS 2",
+             'highSchoolCity': "Seattle",
+             'highSchoolGPA': 3.5,
+             'sourceAssignedCohort': str(i % 40),
+             'destinationAssignedCohort': str((i + 1) % 40),
+             'assignedCohortConflictStatus': "Conflicting Reason"}
+            for i in range(rows)]
+
+
+def applicants(rows):
+    return [Application(adsel_id=100000 + i,
+                        system_key=500000 + i,
+                        application_number=1,
+                        application_type="Freshman",
+                        sdb_app_status=16)
+            for i in range(rows)]
+
+
+def cohort_assignment(rows):
+    return CohortAssignment(applicants=applicants(rows),
+                            assignment_type="upload",
+                            cohort_number=3,
+                            override_previous=False,
+                            override_protected=False,
+                            quarter=20194,
+                            campus=0,
+                            comments="benchmark",
+                            user="javerage",
+                            workspace_id=1)
+
+
+def major_assignment(rows):
+    return MajorAssignment(applicants=applicants(rows),
+                           assignment_type="upload",
+                           major_code="0_CSE_1",
+                           quarter=20194,
+                           campus=0,
+                           comments="benchmark",
+                           user="javerage",
+                           workspace_id=1)
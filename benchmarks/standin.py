@@ -0,0 +1,276 @@
+"""
+A local stand-in for the AdSel services, serving the mock resource tree
+under uw_adsel/resources over HTTP with injected latency, errors, page
+sizes and payload scaling.  Each service listens on its own port.
+
+    python benchmarks/standin.py [--latency lognormal:0.05,0.5]
+                                 [--page-size 50] [--scale 10]
+                                 [--rate-429 0.01] [--rate-5xx 0.01]
+
+Resources are resolved exactly as the Mock DAO resolves them, including
+query string permutations, and POST, PUT, DELETE and GET-with-body
+requests are answered from the same files.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from restclients_core.util.mock import load_resource_from_path
+
+RESOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "..", "uw_adsel", "resources")
+SERVICES = ('adsel', 'adsel_azure_assign', 'adsel_azure_merge')
+# keys whose integer values are offset in each copy of a scaled row, so
+# the copies stay distinct
+SCALED_ID_KEYS = ('admissionsSelectionId', 'systemKey', 'sdbSrcSystemKey',
+                  'decisionImportID')
+SCALED_ID_OFFSET = 10 ** 7
+ERROR_STATUSES = (500, 502, 503)
+
+
+def parse_latency(spec):
+    """
+    Returns a function giving a delay in seconds for each request, from a
+    spec of "fixed:SECONDS", "uniform:LOW,HIGH" or
+    "lognormal:MEDIAN,SIGMA".
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(*values)
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError("Invalid latency {!r}".format(spec))
+
+
+class StandInConfig(object):
+    """
+    Behaviour shared by the stand-in servers.  page_size, if set,
+    re-paginates the paged resources; scale repeats every row of list
+    payloads that many times.
+    """
+    def __init__(self, latency="fixed:0", page_size=None, scale=1,
+                 rate_429=0.0, rate_5xx=0.0):
+        self.latency = parse_latency(latency)
+        self.page_size = page_size
+        self.scale = scale
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond()
+
+    do_POST = do_PUT = do_DELETE = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        config = self.server.config
+        time.sleep(max(0.0, config.latency()))
+
+        draw = random.random()
+        if draw < config.rate_429:
+            return self._send(429, b"Too Many Requests", {"Retry-After": "1"})
+        if draw < config.rate_429 + config.rate_5xx:
+            return self._send(random.choice(ERROR_STATUSES),
+                              b"Injected failure")
+
+        status, data = self.server.load(self.path)
+        self._send(status, data, {"Content-Type": "application/json"})
+
+    def _send(self, status, data, headers={}):
+        data = data or b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Serves one service's mock resources.  port 0 picks a free port.
+    """
+    daemon_threads = True
+
+    def __init__(self, service, config, port=0, host="127.0.0.1"):
+        super().__init__((host, port), StandInHandler)
+        self.service = service
+        self.config = config
+
+    @property
+    def url(self):
+        return "http://{}:{}".format(*self.server_address[:2])
+
+    def _read(self, url):
+        response = load_resource_from_path(RESOURCE_DIR, self.service,
+                                           "file", url, {})
+        data = response.data
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return response.status, data
+
+    def load(self, url):
+        """
+        Returns the status and body for url, paged and scaled as
+        configured.
+        """
+        config = self.config
+        path, _, query = url.partition("?")
+        params = urllib.parse.parse_qsl(query)
+        page = int(dict(params).get("Page", 1))
+        if config.page_size is not None:
+            # pages are cut from the rows of the whole resource
+            params = [(name, value) for name, value in params
+                      if name != "Page"]
+            url = _page_url(path, params, 1)
+
+        status, data = self._read(url)
+        if status != 200 or (config.page_size is None and config.scale == 1):
+            return status, data
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            return status, data
+
+        if isinstance(payload, list):
+            payload = _scale(payload, config.scale)
+        elif isinstance(payload, dict) and "totalCount" in payload:
+            payload = self._page(path, params, page, payload)
+        elif isinstance(payload, dict):
+            for key, value in payload.items():
+                if isinstance(value, list):
+                    payload[key] = _scale(value, config.scale)
+        return status, json.dumps(payload).encode('utf-8')
+
+    def _page(self, path, params, page, payload):
+        key = next(key for key, value in payload.items()
+                   if isinstance(value, list))
+        if self.config.page_size is None:
+            payload[key] = _scale(payload[key], self.config.scale)
+            return payload
+
+        # gather the rows of every page the resource tree has, then slice
+        # them into page_size pages
+        rows = []
+        number = 1
+        current = payload
+        while True:
+            rows.extend(current[key])
+            next_page = int(current.get("nextPage") or number)
+            if next_page <= number:
+                break
+            number = next_page
+            status, data = self._read(_page_url(path, params, number))
+            if status != 200:
+                break
+            current = json.loads(data)
+
+        rows = _scale(rows, self.config.scale)
+        size = self.config.page_size
+        pages = max(1, -(-len(rows) // size))
+        payload[key] = rows[(page - 1) * size:page * size]
+        payload["totalCount"] = pages
+        payload["nextPage"] = str(min(page + 1, pages))
+        payload["previousPage"] = str(max(page - 1, 1))
+        return payload
+
+
+def _page_url(path, params, page):
+    if page > 1:
+        params = params + [("Page", page)]
+    if not len(params):
+        return path
+    return "{}?{}".format(path, urllib.parse.urlencode(params))
+
+
+def _scale(rows, scale):
+    if scale == 1:
+        return rows
+    scaled = []
+    for copy_number in range(scale):
+        for row in rows:
+            if isinstance(row, dict) and copy_number:
+                row = dict(row)
+                for key in SCALED_ID_KEYS:
+                    if isinstance(row.get(key), int):
+                        row[key] += copy_number * SCALED_ID_OFFSET
+            scaled.append(row)
+    return scaled
+
+
+def start_standins(config, ports={}, host="127.0.0.1"):
+    """
+    Starts a stand-in server for each AdSel service in a daemon thread,
+    and returns them by service name.
+    """
+    servers = {}
+    for service in SERVICES:
+        server = StandInServer(service, config, ports.get(service, 0), host)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers[service] = server
+    return servers
+
+
+def stop_standins(servers):
+    for server in servers.values():
+        server.shutdown()
+        server.server_close()
+
+
+def add_arguments(parser):
+    parser.add_argument('--latency', default="fixed:0",
+                        help="fixed:S, uniform:LOW,HIGH or "
+                             "lognormal:MEDIAN,SIGMA, in seconds")
+    parser.add_argument('--page-size', type=int)
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-5xx', type=float, default=0.0)
+
+
+def config_from_arguments(args):
+    return StandInConfig(latency=args.latency, page_size=args.page_size,
+                         scale=args.scale, rate_429=args.rate_429,
+                         rate_5xx=args.rate_5xx)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_arguments(parser)
+    parser.add_argument('--port', type=int, default=8000,
+                        help="port of the first service; the others follow")
+    args = parser.parse_args(argv)
+
+    ports = {service: args.port + offset
+             for offset, service in enumerate(SERVICES)}
+    servers = start_standins(config_from_arguments(args), ports)
+    for service, server in servers.items():
+        print("RESTCLIENTS_{}_HOST={}".format(service.upper(), server.url))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stop_standins(servers)
+
+
+if __name__ == '__main__':
+    main()
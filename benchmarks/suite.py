@@ -0,0 +1,216 @@
+"""
+Measures rows/sec, peak memory and the memory retained by the result of
+the parsing, hydration and serialization paths on synthetic payloads,
+entirely in process, and optionally compares the results with a stored
+baseline.
+
+    python benchmarks/suite.py [--sizes 1000 10000 100000] [--case NAME]
+                               [--save FILE] [--baseline FILE]
+                               [--tolerance 0.2]
+
+Exits with status 1 when a case is slower, or peaks higher, than the
+baseline by more than the tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from unittest import mock
+from collections import OrderedDict
+from commonconf.backends import use_configparser_backend
+from restclients_core.util.mock import MockHTTP
+from uw_adsel import AdSel, AdSelAzureMerge, json_loads, \
+    APPLICATION_FIELDS, STREAM_CHUNK_SIZE
+from uw_adsel.columnar import ApplicationTable
+from uw_adsel.jsonstream import iter_chunks, iter_json_array
+import payloads
+
+
+# the Mock DAO settings used by the unit tests, so no request leaves the
+# process
+use_configparser_backend(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "travis-ci",
+    "test.conf"), 'ADSEL')
+
+
+def applications_hydrate(rows):
+    data = payloads.applications_payload(rows)
+    return lambda: AdSel._get_applications_from_json(json_loads(data))
+
+
+def applications_table(rows):
+    data = payloads.applications_payload(rows)
+    return lambda: ApplicationTable.from_json(json_loads(data))
+
+
+def applications_stream(rows):
+    # walks every application without holding the decoded body or the
+    # models, as iter_all_applications_by_qtr does
+    data = payloads.applications_payload(rows)
+
+    def run():
+        rows = iter_json_array(iter_chunks(data, STREAM_CHUNK_SIZE))
+        for application in APPLICATION_FIELDS.iter_hydrate(rows):
+            pass
+    return run
+
+
+def applications_client(rows):
+    # the full get_all_applications_by_qtr path over a mocked DAO
+    client = AdSel()
+    response = MockHTTP()
+    response.status = 200
+    response.data = payloads.applications_payload(rows)
+
+    def run():
+        with mock.patch.object(client.DAO, 'getURL', return_value=response):
+            return client.get_all_applications_by_qtr(20194, 1)
+    return run
+
+
+def activities_hydrate(rows):
+    data = payloads.activities_payload(rows)
+    client = AdSel()
+    return lambda: client._activities_from_json(json_loads(data))
+
+
+def majors_hydrate(rows):
+    data = payloads.majors_payload(rows)
+    client = AdSel()
+    return lambda: client._majors_from_json(json_loads(data))
+
+
+def conflict_csv(rows):
+    details = payloads.conflict_details(rows)
+    return lambda: AdSelAzureMerge._get_conflict_csv(details)
+
+
+def conflict_csv_stream(rows):
+    data = json.dumps(payloads.conflict_details(rows)).encode()
+
+    def run():
+        for chunk in AdSelAzureMerge._iter_conflict_csv(iter_json_array(
+                iter_chunks(data, STREAM_CHUNK_SIZE))):
+            pass
+    return run
+
+
+def cohort_json_data(rows):
+    assignment = payloads.cohort_assignment(rows)
+    return lambda: json.dumps(assignment.json_data())
+
+
+def cohort_json_bytes(rows):
+    assignment = payloads.cohort_assignment(rows)
+    return assignment.json_bytes
+
+
+def major_json_data(rows):
+    assignment = payloads.major_assignment(rows)
+    return lambda: json.dumps(assignment.json_data())
+
+
+CASES = OrderedDict((case.__name__, case) for case in (
+    applications_hydrate, applications_table, applications_stream,
+    applications_client, activities_hydrate,
+    majors_hydrate, conflict_csv, conflict_csv_stream, cohort_json_data,
+    cohort_json_bytes, major_json_data))
+
+
+def measure(case, rows, repeat):
+    """
+    Returns the best rows/sec over repeat runs, and the peak memory in
+    bytes allocated by one run and retained by its result.
+    """
+    run = case(rows)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    result = run()
+    peak = tracemalloc.get_traced_memory()[1]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return {'rows_per_sec': rows / best, 'peak_bytes': peak,
+            'retained_bytes': retained}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the "case/rows" keys whose rows/sec fell below, or whose peak
+    memory rose above, the baseline by more than tolerance, as a fraction
+    of the baseline.
+    """
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if (result['rows_per_sec'] <
+                expected['rows_per_sec'] * (1 - tolerance) or
+                result['peak_bytes'] >
+                expected['peak_bytes'] * (1 + tolerance)):
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--case', action='append', choices=list(CASES),
+                        help="run only the named case; may be repeated")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', metavar='FILE',
+                        help="write the results as a JSON baseline")
+    parser.add_argument('--baseline', metavar='FILE',
+                        help="compare the results with a saved baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    print("{:<22} {:>8} {:>14} {:>12} {:>14} {:>10}".format(
+        "case", "rows", "rows/s", "peak MB", "retained B/row", "vs base"))
+    results = OrderedDict()
+    for name in args.case or CASES:
+        for rows in args.sizes:
+            key = "{}/{}".format(name, rows)
+            result = results[key] = measure(CASES[name], rows, args.repeat)
+            change = ""
+            if key in baseline:
+                change = "{:+.0%}".format(
+                    result['rows_per_sec'] / baseline[key]['rows_per_sec'] -
+                    1)
+            print("{:<22} {:>8} {:>14,.0f} {:>12.1f} {:>14,.0f} {:>10}".format(
+                name, rows, result['rows_per_sec'],
+                result['peak_bytes'] / 2 ** 20,
+                result['retained_bytes'] / rows, change))
+
+    if args.save:
+        with open(args.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+    regressions = compare(results, baseline, args.tolerance)
+    if len(regressions):
+        print("Worse than baseline by more than {:.0%}: {}".format(
+            args.tolerance, ", ".join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
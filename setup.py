@@ -26,6 +26,7 @@ setup(
                       'mock',
                       'python-dateutil'
                      ],
+    extras_require={'fast': ['orjson']},
     license='Apache License, Version 2.0',
     description=('A library for connecting to the AdSel API at the University'
                  ' of Washington'),
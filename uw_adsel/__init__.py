@@ -6,26 +6,103 @@ import json
 import logging
 import string
 import io
+import re
+import time
+import copy
 from restclients_core.exceptions import DataFailureException
-from restclients_core.dao import MockDAO
 from uw_adsel.dao import ADSEL_DAO
 from uw_adsel.adselazure_assign_dao import ADSEL_AZURE_ASSIGN_DAO
 from uw_adsel.adselazure_merge_dao import ADSEL_AZURE_MERGE_DAO
+from uw_adsel.exceptions import PartialFailureException, \
+    CircuitOpenException
+from uw_adsel.index import ApplicationIndex
+from uw_adsel.preflight import diff_cohort_assignment, diff_major_assignment
+from uw_adsel.mergeplan import MergePlan, COHORT, MAJOR
+from uw_adsel.conflicts import ConflictEngine
+from uw_adsel.cache import NoCache
+from uw_adsel.metrics import NoMetrics, url_template, body_size
+from uw_adsel.resilience import FAILURE_STATUSES
+from uw_adsel.columnar import ApplicationTable
+from uw_adsel.jsonstream import iter_chunks, iter_json_array
 from uw_adsel.models import Major, Cohort, Quarter, Activity, Application, \
     Decision, AdminMajor, AdminCohort, Workspace, MajorConflict, \
-    CohortConflict
+    CohortConflict, CohortMerge, QuarterSnapshot, FieldMap
 import dateutil.parser
 from datetime import datetime
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 
 logger = logging.getLogger(__name__)
 
 # max page size 300
 PAGE_SIZE = 300
+# default concurrency when prefetching paginated resources
+PAGE_WORKERS = 4
+# keys sent per request, and requests in flight, for bulk lookups
+BULK_CHUNK_SIZE = 1000
+BULK_WORKERS = 4
+# assignment requests in flight when submitting in chunks
+ASSIGNMENT_WORKERS = 2
+# conflict checks and merges in flight when planning merges
+MERGE_WORKERS = 4
+# bytes of a response body decoded at a time when streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+# reference data endpoints that may be cached, matched against the whole
+# URL path so that e.g. /admin/cohorts/{qtr} isn't taken for /cohorts/{qtr}
+CACHE_ENDPOINTS = {
+    'quarters': r"^/api/v1/academicqtr$",
+    'admin_majors': r"^/api/v1/admin/majors$",
+    'admin_majorvalues': r"^/api/v1/admin/majorvalues$",
+    'decisions': r"^/api/v1/departmentaldecisions/GetWithCounts$",
+    'static_filters': r"^/api/v1/filter/static$",
+    'workspaces': r"^/api/v1/workspaces/\d+$",
+    'majors': r"^/api/v1/majors/details/(?P<quarter>\d+)(/[^/]+)?$",
+    'cohorts': r"^/api/v1/cohorts/(?P<quarter>\d+)$",
+}
+# seconds a cached response stays fresh, per endpoint
+CACHE_TTLS = {
+    'quarters': 3600,
+    'admin_majors': 900,
+    'admin_majorvalues': 3600,
+    'decisions': 300,
+    'static_filters': 3600,
+    'workspaces': 300,
+    'majors': 300,
+    'cohorts': 300,
+}
+# count endpoints each write makes stale for the quarter and workspace it
+# touches
+WRITE_DEPENDENCIES = {
+    'assign_majors': ('majors',),
+    'assign_cohorts': ('cohorts',),
+    'assign_purple_gold': ('majors', 'cohorts', 'decisions'),
+    'assign_decisions': ('decisions',),
+    'merge_major': ('majors',),
+    'merge_cohort': ('cohorts',),
+    'reset_workspace': ('majors', 'cohorts', 'decisions'),
+    'delete_workspace': ('majors', 'cohorts', 'decisions'),
+}
 MAJOR_TYPE = "major"
 COHORT_TYPE = "cohort"
 
+APPLICATION_FIELDS = FieldMap(
+    Application,
+    {'adsel_id': 'admissionsSelectionId',
+     'application_number': 'applicationNbr',
+     'system_key': 'systemKey',
+     'campus': 'campus',
+     'quarter_id': 'academicQtrKeyId',
+     'assigned_cohort': 'assignedCohort',
+     'assigned_major': 'assignedMajor',
+     'major_program_code': 'majorProgramCode',
+     'application_type': 'applicationType'},
+    {'sdb_app_status': 'sdbApplicationStatus'})
+
 
 class AdSel(object):
     """
@@ -35,24 +112,60 @@ class AdSel(object):
 
     def __init__(self, config={}):
         self.DAO = ADSEL_DAO()
+        self._configure(config)
+
+    def _configure(self, config):
+        self.config = config
+        self.prefetch_pages = config.get('prefetch_pages', False)
+        self.page_workers = config.get('page_workers', PAGE_WORKERS)
+        self.bulk_chunk_size = config.get('bulk_chunk_size', BULK_CHUNK_SIZE)
+        self.bulk_workers = config.get('bulk_workers', BULK_WORKERS)
+        self.assignment_chunk_size = config.get('assignment_chunk_size')
+        self.assignment_workers = config.get('assignment_workers',
+                                             ASSIGNMENT_WORKERS)
+        self.merge_workers = config.get('merge_workers', MERGE_WORKERS)
+        self.echo_requests = config.get('echo_requests', True)
+        self.preflight = config.get('preflight', False)
+        self.cache = config.get('cache', NoCache())
+        self.metrics = config.get('metrics', NoMetrics())
+        self.retry = config.get('retry')
+        self.circuit_breakers = config.get('circuit_breakers')
+        self.cache_ttls = dict(CACHE_TTLS, **config.get('cache_ttls', {}))
+
+    def _client(self, client_class):
+        """
+        Returns a client_class instance with this client's config, created
+        on first use and reused by later calls.
+        """
+        if type(self) is client_class:
+            return self
+        clients = self.__dict__.setdefault('_clients', {})
+        client = clients.get(client_class)
+        if client is None:
+            client = clients[client_class] = client_class(self.config)
+        return client
 
     def assign_majors(self, major_assignment):
-        return AdSelAzureAssign().assign_majors(major_assignment)
+        return self._client(AdSelAzureAssign).assign_majors(major_assignment)
 
     def assign_cohorts_bulk(self, cohort_assignment):
-        return AdSelAzureAssign().assign_cohorts_bulk(cohort_assignment)
+        return self._client(AdSelAzureAssign).assign_cohorts_bulk(
+            cohort_assignment)
 
     def assign_cohorts_manual(self, cohort_assignment):
-        return AdSelAzureAssign().assign_cohorts_manual(cohort_assignment)
+        return self._client(AdSelAzureAssign).assign_cohorts_manual(
+            cohort_assignment)
 
     def assign_purple_gold(self, pg_assignments):
-        return AdSelAzureAssign().assign_pugo(pg_assignments)
+        return self._client(AdSelAzureAssign).assign_pugo(pg_assignments)
 
     def assign_decisions(self, decision_assignment):
         url = "{}/assignments/departmentalDecision".format(self.API)
-        request = decision_assignment.json_data()
-        response = self._post_resource(url, request)
-        return {"response": response, "request": request}
+        result = self._post_assignment(url, decision_assignment)
+        self._invalidate_counts('assign_decisions',
+                                decision_assignment.quarter,
+                                decision_assignment.workspace_id)
+        return result
 
     def get_quarters(self, **kwargs):
         url = "{}/academicqtr".format(self.API)
@@ -77,38 +190,64 @@ class AdSel(object):
             quarters.append(qtr)
         return quarters
 
-    def get_all_applications_by_qtr(self, quarter_id, workspace_id):
+    def get_all_applications_by_qtr(self,
+                                    quarter_id,
+                                    workspace_id,
+                                    compact=False):
+        """
+        Returns the applications in a workspace, as Application models or,
+        with compact, as an ApplicationTable.
+        """
         url = "{}/applications/{}/all/{}".format(self.API,
                                                  quarter_id,
                                                  workspace_id)
         response = self._get_resource(url)
-        applications = self._get_applications_from_json(response)
+        if compact:
+            return self._hydrate(url, ApplicationTable.from_json, response)
+        applications = self._hydrate(url, self._get_applications_from_json,
+                                     response)
         return applications
 
+    def iter_all_applications_by_qtr(self, quarter_id, workspace_id):
+        """
+        Yields the applications in a workspace as the response body is
+        decoded, without first building the full list of JSON rows or
+        Application models.
+        """
+        url = "{}/applications/{}/all/{}".format(self.API,
+                                                 quarter_id,
+                                                 workspace_id)
+        start = time.perf_counter()
+        response = self._call_dao("GET", url, lambda: self.DAO.getURL(
+            url, self._headers()))
+        self._record_request("GET", url, response,
+                             time.perf_counter() - start)
+        if response.status != 200:
+            self._log_error(url, response)
+            raise DataFailureException(url, response.status, response.data)
+
+        rows = iter_json_array(iter_chunks(response.data, STREAM_CHUNK_SIZE))
+        return APPLICATION_FIELDS.iter_hydrate(rows)
+
     def get_applications_by_qtr_syskey(self, quarter_id, syskey, workspace_id):
         url = "{}/applications/{}/{}/{}".format(self.API,
                                                 quarter_id,
                                                 syskey,
                                                 workspace_id)
         response = self._get_resource(url)
-        application = self._get_applications_from_json(response)
+        application = self._hydrate(url, self._get_applications_from_json,
+                                    response)
         return application
 
     def get_applications_by_qtr_syskey_list(self,
                                             quarter_id,
                                             syskey_list,
                                             workspace_id):
-        if isinstance(self.DAO.get_implementation(), MockDAO):
-            all_applications = self._get_live_apps_by_qtr_syskey_list(
-                quarter_id,
-                syskey_list,
-                workspace_id)
-            return [app for app in all_applications
-                    if app.system_key in syskey_list]
-        else:
-            return self._get_live_apps_by_qtr_syskey_list(quarter_id,
-                                                          syskey_list,
-                                                          workspace_id)
+        applications = self._get_live_apps_by_qtr_syskey_list(quarter_id,
+                                                              syskey_list,
+                                                              workspace_id)
+        index = ApplicationIndex(applications, 'system_key')
+        return index.select(syskey_list)
 
     def _get_live_apps_by_qtr_syskey_list(self, quarter_id,
                                           syskey_list,
@@ -116,25 +255,18 @@ class AdSel(object):
         url = "{}/applications/SystemKeys/{}/{}".format(self.API,
                                                         quarter_id,
                                                         workspace_id)
-        response = self._post_resource(url, syskey_list)
-        applications = self._get_applications_from_json(response)
-        return applications
+        return self._post_chunked_lookup(url, syskey_list)
 
     def get_applications_by_qtr_adselid_list(self,
                                              quarter_id,
                                              adselid_list,
                                              workspace_id):
-        if isinstance(self.DAO.get_implementation(), MockDAO):
-            all_applications = self._get_live_apps_by_qtr_adselid_list(
-                quarter_id,
-                adselid_list,
-                workspace_id)
-            return [app for app in all_applications
-                    if app.adsel_id in adselid_list]
-        else:
-            return self._get_live_apps_by_qtr_adselid_list(quarter_id,
-                                                           adselid_list,
-                                                           workspace_id)
+        applications = self._get_live_apps_by_qtr_adselid_list(
+            quarter_id,
+            adselid_list,
+            workspace_id)
+        index = ApplicationIndex(applications, 'adsel_id')
+        return index.select(adselid_list)
 
     def _get_live_apps_by_qtr_adselid_list(self,
                                            quarter_id,
@@ -143,48 +275,99 @@ class AdSel(object):
         url = "{}/applications/AdmissionSelectionId/{}/{}".format(self.API,
                                                                   quarter_id,
                                                                   workspace_id)
-        response = self._post_resource(url, adselid_list)
-        applications = self._get_applications_from_json(response)
+        return self._post_chunked_lookup(url, adselid_list)
+
+    def _post_chunked_lookup(self, url, keys):
+        """
+        POSTs the keys in chunks of bulk_chunk_size, with up to
+        bulk_workers requests in flight, and merges the returned
+        applications in chunk order with duplicates removed.  If any chunk
+        fails, a PartialFailureException holding the applications from the
+        successful chunks is raised.
+        """
+        size = self.bulk_chunk_size
+        chunks = [keys[i:i + size] for i in range(0, len(keys), size)]
+        if len(chunks) == 0:
+            chunks = [keys]
+
+        def lookup(chunk):
+            response = self._post_resource(url, chunk)
+            return self._hydrate(url, self._get_applications_from_json,
+                                 response)
+
+        workers = max(1, min(self.bulk_workers, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(lookup, chunk) for chunk in chunks]
+
+        applications = []
+        failures = []
+        seen = set()
+        for index, future in enumerate(futures):
+            try:
+                chunk_apps = future.result()
+            except DataFailureException as ex:
+                failures.append({"chunk": index,
+                                 "keys": chunks[index],
+                                 "error": ex})
+                continue
+            for app in chunk_apps:
+                if app.adsel_id not in seen:
+                    seen.add(app.adsel_id)
+                    applications.append(app)
+
+        if len(failures) > 0:
+            raise PartialFailureException(url, applications, failures)
         return applications
 
     @staticmethod
     def _get_applications_from_json(response):
-        applications = []
-        for app in response:
-            application = Application()
-            application.adsel_id = app['admissionsSelectionId']
-            application.application_number = app['applicationNbr']
-            application.system_key = app['systemKey']
-            application.campus = app['campus']
-            application.quarter_id = app['academicQtrKeyId']
-            application.assigned_cohort = app['assignedCohort']
-            application.assigned_major = app['assignedMajor']
-            application.major_program_code = app['majorProgramCode']
-            application.application_type = app['applicationType']
-            try:
-                application.sdb_app_status = app['sdbApplicationStatus']
-            except KeyError:
-                pass
-            applications.append(application)
+        return APPLICATION_FIELDS.hydrate(response)
 
-        return applications
+    def get_filtered_activities(self, *args, **kwargs):
+        url = "{}/activities".format(self.API)
+        filters = self._activity_filters(*args, **kwargs)
+        try:
+            activities = []
+            for response in self._get_pages(url, filters):
+                activities.extend(self._hydrate(
+                    url, self._activities_from_json, response))
+            return activities
+        except DataFailureException as ex:
+            if ex.status == 404:
+                return []
+            raise
+
+    def get_activities(self, **kwargs):
+        return self.get_filtered_activities()
 
-    def get_filtered_activities(self,
-                                netid=None,
-                                assignment_type=None,
-                                cohort=None,
-                                major=None,
-                                start_date=None,
-                                end_date=None,
-                                system_key=None,
-                                adsel_id=None,
-                                collection_type=None,
-                                assignment_period=None,
-                                comment=None,
-                                assingment_category=None,
-                                application_type=None,
-                                workspace_id=None):
+    def iter_activities(self, *args, **kwargs):
+        """
+        Yields Activity objects across every page of the activity log,
+        requesting each page only once the previous one is consumed.
+        Accepts the same filters as get_filtered_activities, and likewise
+        yields nothing when no activity matches them (a 404).
+        """
         url = "{}/activities".format(self.API)
+        filters = self._activity_filters(*args, **kwargs)
+        for response in self._iter_pages(url, filters, missing_ok=True):
+            for activity in self._activities_from_json(response):
+                yield activity
+
+    def _activity_filters(self,
+                          netid=None,
+                          assignment_type=None,
+                          cohort=None,
+                          major=None,
+                          start_date=None,
+                          end_date=None,
+                          system_key=None,
+                          adsel_id=None,
+                          collection_type=None,
+                          assignment_period=None,
+                          comment=None,
+                          assingment_category=None,
+                          application_type=None,
+                          workspace_id=None):
         filters = {}
         if netid is not None:
             filters['netid'] = netid
@@ -214,17 +397,7 @@ class AdSel(object):
             filters['assignmentCategory'] = assingment_category
         if workspace_id is not None:
             filters['workspaceId'] = workspace_id
-        filter_url = urllib.parse.urlencode(filters)
-        if len(filter_url) > 0:
-            url = url + "?" + filter_url
-        try:
-            response = self._get_resource(url)
-            return self._activities_from_json(response)
-        except DataFailureException:
-            return []
-
-    def get_activities(self, **kwargs):
-        return self.get_filtered_activities()
+        return filters
 
     def _activities_from_json(self, response):
         activities = []
@@ -247,12 +420,31 @@ class AdSel(object):
         return activities
 
     def get_cohorts_by_qtr(self, quarter_id, workspace_id=None, **kwargs):
+        url, params = self._cohorts_url(quarter_id, workspace_id)
+        cohorts = []
+        for response in self._get_pages(url, params):
+            cohorts.extend(self._hydrate(url, self._cohorts_from_json,
+                                         response))
+        return cohorts
+
+    def iter_cohorts_by_qtr(self, quarter_id, workspace_id=None):
+        """
+        Yields the cohorts across every page, whether or not
+        prefetch_pages is set, requesting each page only once the
+        previous one is consumed.
+        """
+        url, params = self._cohorts_url(quarter_id, workspace_id)
+        for response in self._iter_pages(url, params):
+            for cohort in self._hydrate(url, self._cohorts_from_json,
+                                        response):
+                yield cohort
+
+    def _cohorts_url(self, quarter_id, workspace_id):
         url = "{}/cohorts/{}".format(self.API, quarter_id)
+        params = {}
         if workspace_id is not None:
-            url += "?" + urllib.parse.urlencode({'workspaceId': workspace_id})
-        response = self._get_resource(url)
-        cohorts = self._cohorts_from_json(response)
-        return cohorts
+            params['workspaceId'] = workspace_id
+        return url, params
 
     def _cohorts_from_json(self, response):
         cohorts = []
@@ -278,7 +470,7 @@ class AdSel(object):
         if workspace_id is not None:
             url += "&" + urllib.parse.urlencode({'workspaceId': workspace_id})
         response = self._get_resource(url)
-        decisions = self._decisions_from_json(response)
+        decisions = self._hydrate(url, self._decisions_from_json, response)
         return decisions
 
     def _decisions_from_json(self, response):
@@ -310,7 +502,7 @@ class AdSel(object):
                                                            quarter_id,
                                                            workspace_id)
         response = self._get_resource(url)
-        majors = self._majors_from_json(response)
+        majors = self._hydrate(url, self._majors_from_json, response)
         return majors
 
     def _majors_from_json(self, response):
@@ -392,16 +584,19 @@ class AdSel(object):
 
     def get_admin_majorvalues(self):
         url = "{}/admin/majorvalues".format(self.API)
-        response = self._get_resource(url)
-        return response
+        return self._get_json(url)
 
     def post_admin_major(self, major):
         url = "{}/admin/major".format(self.API)
-        return self._post_resource(url, major.json_data())
+        response = self._post_resource(url, major.json_data())
+        self._invalidate_cache('admin_majors', 'static_filters')
+        return response
 
     def put_admin_major(self, major):
         url = "{}/admin/major".format(self.API)
-        return self._put_resource(url, major.json_data())
+        response = self._put_resource(url, major.json_data())
+        self._invalidate_cache('admin_majors', 'static_filters')
+        return response
 
     def get_admin_cohorts_by_qtr(self, qtr):
         url = "{}/admin/cohorts/{}".format(self.API, qtr)
@@ -440,17 +635,23 @@ class AdSel(object):
 
     def post_admin_cohort(self, cohort):
         url = "{}/admin/cohort".format(self.API)
-        return self._post_resource(url, cohort.json_data())
+        response = self._post_resource(url, cohort.json_data())
+        self._invalidate_cache('static_filters', 'cohorts')
+        return response
 
     def put_admin_cohort(self, cohort):
         url = "{}/admin/cohort".format(self.API)
-        return self._put_resource(url, cohort.json_data())
+        response = self._put_resource(url, cohort.json_data())
+        self._invalidate_cache('static_filters', 'cohorts')
+        return response
 
     def copy_cohort(self, from_cohort_id, to_cohort_id):
         url = "{}/admin/cohort/copy/{}/{}".format(self.API,
                                                   from_cohort_id,
                                                   to_cohort_id)
-        return self._post_resource(url, {})
+        response = self._post_resource(url, {})
+        self._invalidate_cache('static_filters', 'cohorts')
+        return response
 
     def get_periods_without_cohorts(self):
         url = "{}/academicqtr/WithoutCohorts".format(self.API)
@@ -474,8 +675,77 @@ class AdSel(object):
         params = {k: v for k, v in filters.items() if v is not None}
         filter_url = urllib.parse.urlencode(params)
         url = url + "?" + filter_url
-        response = self._get_resource(url)
-        return response
+        return self._get_json(url)
+
+    def get_quarter_snapshot(self,
+                             quarter_id,
+                             workspace_id,
+                             year=None,
+                             quarter=None,
+                             report_view=0):
+        """
+        Reads the majors, cohorts, decisions, workspaces and static and
+        dynamic filter values for a quarter and workspace concurrently.
+        The filter year and quarter default to the appl_yr and appl_qtr of
+        the Quarter whose id is quarter_id; when that lookup fails, both
+        filter components fail with its error.  A component that fails is
+        recorded in the snapshot's errors while the others are still
+        returned.
+        """
+        snapshot = QuarterSnapshot(quarter_id, workspace_id)
+        with ThreadPoolExecutor(max_workers=len(QuarterSnapshot.COMPONENTS) +
+                                1) as executor:
+            # the filter year and quarter are looked up alongside the other
+            # reads, and a failed lookup fails only the filter components
+            filter_quarter = executor.submit(self._filter_quarter,
+                                             quarter_id, year, quarter)
+
+            def filter_values(method):
+                def read_filters():
+                    return method(*filter_quarter.result(), report_view)
+                return read_filters
+
+            components = {
+                'majors': (self.get_majors_by_qtr,
+                           (quarter_id, workspace_id)),
+                'cohorts': (self.get_cohorts_by_qtr,
+                            (quarter_id, workspace_id)),
+                'decisions': (self.get_decisions,
+                              (quarter_id, workspace_id)),
+                'workspaces': (self.get_workspaces_by_qtr, (quarter_id,)),
+                'static_filters': (
+                    filter_values(self.get_static_filter_values), ()),
+                'dynamic_filters': (
+                    filter_values(self.get_dynamic_filter_values), ()),
+            }
+
+            def read(component):
+                method, args = components[component]
+                start = time.perf_counter()
+                try:
+                    setattr(snapshot, component, method(*args))
+                except Exception as ex:
+                    snapshot.errors[component] = ex
+                snapshot.timings[component] = time.perf_counter() - start
+
+            list(executor.map(read, components))
+        return snapshot
+
+    def _filter_quarter(self, quarter_id, year, quarter):
+        """
+        Returns the filter (year, quarter), defaulting either to the
+        appl_yr or appl_qtr of the Quarter whose id is quarter_id.
+        """
+        if year is not None and quarter is not None:
+            return year, quarter
+        matches = [qtr for qtr in self.get_quarters()
+                   if str(qtr.id) == str(quarter_id)]
+        if not len(matches):
+            raise ValueError(
+                "No academic quarter {}; pass year and quarter".format(
+                    quarter_id))
+        return (matches[0].appl_yr if year is None else year,
+                matches[0].appl_qtr if quarter is None else quarter)
 
     def delete_workspace(self, workspace_id, uwnetid):
         params = {
@@ -487,7 +757,11 @@ class AdSel(object):
             "{}/workspaces?{}"
             .format(self.API,
                     encoded_params))
-        return self._delete_resource(url)
+        response = self._delete_resource(url)
+        self._invalidate_cache('workspaces')
+        self._invalidate_counts('delete_workspace',
+                                workspace_id=workspace_id)
+        return response
 
     def duplicate_workspace(self,
                             workspace_id,
@@ -500,7 +774,9 @@ class AdSel(object):
         }
         encoded_params = urllib.parse.urlencode(params)
         url = (("{}/workspaces/duplicate?{}").format(self.API, encoded_params))
-        return self._post_resource(url, {})
+        response = self._post_resource(url, {})
+        self._invalidate_cache('workspaces')
+        return response
 
     def reset_workspace(self, workspace_id, uwnetid):
         params = {
@@ -510,7 +786,10 @@ class AdSel(object):
         encoded_params = urllib.parse.urlencode(params)
         url = "{}/workspaces/reset?{}".format(
             self.API, encoded_params)
-        return self._post_resource(url, {})
+        response = self._post_resource(url, {})
+        self._invalidate_cache('workspaces')
+        self._invalidate_counts('reset_workspace', workspace_id=workspace_id)
+        return response
 
     def get_workspaces_by_qtr(self, qtr):
         url = "{}/workspaces/{}".format(self.API, qtr)
@@ -532,44 +811,289 @@ class AdSel(object):
             workspaces.append(Workspace(**json_data))
         return workspaces
 
+    def _get_pages(self, url, params={}):
+        """
+        Returns the first page of a paginated resource or, when
+        prefetch_pages is configured, every page in order.  The page count
+        from the first response is used to request the remaining pages
+        concurrently, at most page_workers at a time.
+        """
+        first = self._get_resource(self._page_url(url, params))
+        if not self.prefetch_pages:
+            return [first]
+
+        try:
+            page_count = int(first['totalCount'])
+        except (KeyError, TypeError, ValueError):
+            page_count = 1
+        if page_count < 2:
+            return [first]
+
+        page_urls = [self._page_url(url, params, page)
+                     for page in range(2, page_count + 1)]
+        workers = max(1, min(self.page_workers, len(page_urls)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return [first] + list(executor.map(self._get_resource, page_urls))
+
+    def _iter_pages(self, url, params={}, missing_ok=False):
+        """
+        Yields each page of a paginated resource, following the
+        nextPage/totalCount envelope one request at a time.  With
+        missing_ok, a 404 for the first page yields no pages.
+        """
+        page = 1
+        while page is not None:
+            try:
+                response = self._get_resource(
+                    self._page_url(url, params, page))
+            except DataFailureException as ex:
+                if missing_ok and page == 1 and ex.status == 404:
+                    return
+                raise
+            yield response
+            page = self._next_page(response, page)
+
+    @staticmethod
+    def _page_url(url, params, page=1):
+        if page > 1:
+            params = dict(params, Page=page)
+        if len(params) > 0:
+            url = url + "?" + urllib.parse.urlencode(params)
+        return url
+
+    @staticmethod
+    def _next_page(response, page):
+        # The last page repeats its own number as nextPage
+        try:
+            next_page = int(response['nextPage'])
+            page_count = int(response['totalCount'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if page < next_page <= page_count:
+            return next_page
+        return None
+
     def _get_resource(self, url):
-        response = self.DAO.getURL(url, self._headers())
+        endpoint = self._cache_endpoint(url)
+        if endpoint is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
+        response = self._call_dao("GET", url, lambda: self.DAO.getURL(
+            url, self._headers()))
+        network = time.perf_counter() - start
 
         if response.status != 200:
+            self._record_request("GET", url, response, network)
             self._log_error(url, response)
             raise DataFailureException(url, response.status, response.data)
 
-        return json.loads(response.data)
+        data = json_loads(response.data)
+        self._record_request("GET", url, response, network,
+                             time.perf_counter() - start - network)
+        if endpoint is not None:
+            self.cache.set(url, data, self.cache_ttls[endpoint])
+        return data
+
+    def _get_json(self, url):
+        """
+        Returns the parsed JSON of a GET for methods that hand it to the
+        caller as is.  A cached response is shared, so the caller gets
+        its own copy, free to modify.
+        """
+        data = self._get_resource(url)
+        if (not isinstance(self.cache, NoCache) and
+                self._cache_endpoint(url) is not None):
+            data = copy.deepcopy(data)
+        return data
+
+    def _cache_endpoint(self, url):
+        path = url.split("?", 1)[0]
+        for endpoint, pattern in CACHE_ENDPOINTS.items():
+            if re.search(pattern, path):
+                return endpoint
+        return None
+
+    def _invalidate_cache(self, *endpoints):
+        """
+        Drops cached responses for the named endpoints.  Called by the
+        write methods that change the data those endpoints return.
+        """
+        patterns = [CACHE_ENDPOINTS[endpoint] for endpoint in endpoints]
+        self.cache.invalidate(
+            lambda url: any(re.search(pattern, url.split("?", 1)[0])
+                            for pattern in patterns))
 
     def _post_resource(self, url, request):
-        response = self.DAO.postURL(url,
-                                    self._post_headers(),
-                                    body=json.dumps(request))
+        return self._post_body(url, json.dumps(request))
+
+    def _post_assignment(self, url, assignment):
+        request, body = self._serialize_assignment(assignment)
+        response = self._post_body(url, body)
+        return {"response": response, "request": request}
+
+    def _serialize_assignment(self, assignment):
+        """
+        Returns the request dict and body for an assignment.  With
+        echo_requests disabled no request dict is built, and the body is
+        written directly as bytes.
+        """
+        if self.echo_requests:
+            request = assignment.json_data()
+            return request, json.dumps(request)
+        return None, assignment.json_bytes()
+
+    def _post_body(self, url, body):
+        start = time.perf_counter()
+        response = self._call_dao("POST", url, lambda: self.DAO.postURL(
+            url, self._post_headers(), body=body))
+        network = time.perf_counter() - start
         if response.status not in [200, 201]:
+            self._record_request("POST", url, response, network, body=body)
             self._log_error(url, response)
             raise DataFailureException(url, response.status, response.data)
         try:
-            return json.loads(response.data)
+            data = json.loads(response.data)
         except json.JSONDecodeError:
-            return {"string_response": response.data.decode('utf-8')}
+            data = {"string_response": response.data.decode('utf-8')}
+        self._record_request("POST", url, response, network,
+                             time.perf_counter() - start - network, body)
+        return data
 
     def _put_resource(self, url, request):
-        response = self.DAO.putURL(url,
-                                   self._post_headers(),
-                                   body=json.dumps(request))
+        body = json.dumps(request)
+        start = time.perf_counter()
+        response = self._call_dao("PUT", url, lambda: self.DAO.putURL(
+            url, self._post_headers(), body=body))
+        network = time.perf_counter() - start
         if response.status not in [200, 201]:
+            self._record_request("PUT", url, response, network, body=body)
             self._log_error(url, response)
             raise DataFailureException(url, response.status, response.data)
 
-        return json.loads(response.data)
+        data = json.loads(response.data)
+        self._record_request("PUT", url, response, network,
+                             time.perf_counter() - start - network, body)
+        return data
 
     def _delete_resource(self, url):
-        response = self.DAO.deleteURL(url,
-                                      self._post_headers())
+        start = time.perf_counter()
+        response = self._call_dao("DELETE", url, lambda: self.DAO.deleteURL(
+            url, self._post_headers()))
+        network = time.perf_counter() - start
         if response.status not in [200, 201]:
+            self._record_request("DELETE", url, response, network)
             self._log_error(url, response)
             raise DataFailureException(url, response.status, response.data)
-        return json.loads(response.data)
+        data = json.loads(response.data)
+        self._record_request("DELETE", url, response, network,
+                             time.perf_counter() - start - network)
+        return data
+
+    def _call_dao(self, method, url, request):
+        """
+        Returns the response of request(), a single DAO call, made under
+        the service's circuit breaker when circuit_breakers is configured.
+        With a retry policy, GETs that fail with a retryable status are
+        retried after a backoff; other methods are never retried.
+        """
+        service = self.DAO.service_name()
+        breaker = None
+        if self.circuit_breakers is not None:
+            breaker = self.circuit_breakers.get(service)
+
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow_call():
+                self.metrics.record_circuit(service, breaker.state,
+                                            rejected=True)
+                raise CircuitOpenException(url, service)
+            response = error = None
+            try:
+                response = request()
+                status = response.status
+            except DataFailureException as ex:
+                # connection errors and timeouts
+                error = ex
+                status = ex.status
+            except Exception:
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+
+            if breaker is not None:
+                if status in FAILURE_STATUSES:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                self.metrics.record_circuit(service, breaker.state)
+
+            if (method == "GET" and self.retry is not None and
+                    self.retry.should_retry(attempt, status)):
+                self.metrics.record_retry(method, url_template(url), status)
+                time.sleep(self.retry.delay(attempt, response))
+                attempt += 1
+                continue
+            if error is not None:
+                raise error
+            return response
+
+    def _record_request(self, method, url, response, network, parse=None,
+                        body=None):
+        self.metrics.record_request(method, url_template(url),
+                                    response.status, network, parse,
+                                    body_size(body),
+                                    body_size(response.data))
+
+    def _hydrate(self, url, hydrate, data):
+        """
+        Returns hydrate(data), recording the time it took and the number
+        of models built against the URL template.
+        """
+        start = time.perf_counter()
+        models = hydrate(data)
+        self.metrics.record_hydrate(url_template(url),
+                                    time.perf_counter() - start, len(models))
+        return models
+
+    def _invalidate_counts(self, write, quarter_id=None, workspace_id=None):
+        """
+        Drops the cached count responses that write makes stale, following
+        WRITE_DEPENDENCIES.  Only reads for quarter_id and workspace_id are
+        dropped; a None quarter_id or workspace_id matches every quarter or
+        workspace, and reads made without a workspace are always dropped.
+        """
+        endpoints = WRITE_DEPENDENCIES[write]
+
+        def is_stale(url):
+            read_key = self._count_read_key(url)
+            if read_key is None or read_key[0] not in endpoints:
+                return False
+            endpoint, quarter, workspace = read_key
+            return ((quarter_id is None or quarter == str(quarter_id)) and
+                    (workspace_id is None or workspace in (None, "None") or
+                     workspace == str(workspace_id)))
+
+        self.cache.invalidate(is_stale)
+
+    @staticmethod
+    def _count_read_key(url):
+        """
+        Returns the (endpoint, quarter_id, workspace_id) a cached count URL
+        was read for, with ids as strings, or None for other URLs.
+        """
+        path, _, query = url.partition("?")
+        params = urllib.parse.parse_qs(query)
+        for endpoint in ('majors', 'cohorts', 'decisions'):
+            match = re.search(CACHE_ENDPOINTS[endpoint], path)
+            if match:
+                quarter = match.groupdict().get(
+                    'quarter', params.get('academicQtrKeyId', [None])[0])
+                workspace = params.get('workspaceId', [None])[0]
+                return endpoint, quarter, workspace
+        return None
 
     def _headers(self):
         headers = {"Accept": "application/json"}
@@ -589,32 +1113,138 @@ class AdSelAzureAssign(AdSel):
     The AdSel object has methods for interacting with endpoints
     deployed to azureapi for assignments
     """
-    def __init__(self):
+    def __init__(self, config={}):
         self.DAO = ADSEL_AZURE_ASSIGN_DAO()
+        self._configure(config)
 
     def assign_cohorts_manual(self, cohort_assignment):
         url = "/cohort"
-        request = cohort_assignment.json_data()
-        response = self._post_resource(url, request)
-        return {"response": response, "request": request}
+        result = self._post_assignment(url, cohort_assignment)
+        self._invalidate_counts('assign_cohorts',
+                                cohort_assignment.quarter,
+                                cohort_assignment.workspace_id)
+        return result
 
     def assign_cohorts_bulk(self, cohort_assignment):
         url = "/cohort/bulk"
-        request = cohort_assignment.json_data()
-        response = self._post_resource(url, request)
-        return {"response": response, "request": request}
+        diff = None
+        if self.preflight:
+            diff = self._preflight_cohorts(cohort_assignment)
+        result = self._post_bulk_assignment(url, cohort_assignment, diff)
+        self._invalidate_counts('assign_cohorts',
+                                cohort_assignment.quarter,
+                                cohort_assignment.workspace_id)
+        return result
 
     def assign_pugo(self, pg_assignments):
         url = "/pugo"
-        request = pg_assignments.json_data()
-        response = self._post_resource(url, request)
-        return {"response": response, "request": request}
+        result = self._post_assignment(url, pg_assignments)
+        self._invalidate_counts('assign_purple_gold',
+                                pg_assignments.quarter,
+                                pg_assignments.workspace_id)
+        return result
 
     def assign_majors(self, major_assignment):
         url = "/major"
-        request = major_assignment.json_data()
-        response = self._post_resource(url, request)
-        return {"response": response, "request": request}
+        diff = None
+        if self.preflight:
+            diff = self._preflight_majors(major_assignment)
+        result = self._post_bulk_assignment(url, major_assignment, diff)
+        self._invalidate_counts('assign_majors',
+                                major_assignment.quarter,
+                                major_assignment.workspace_id)
+        return result
+
+    def _preflight_cohorts(self, assignment):
+        client = self._client(AdSel)
+        current = self._current_applications(client, assignment)
+        # every page, so a protected cohort on a later one isn't missed
+        cohorts = client.iter_cohorts_by_qtr(assignment.quarter,
+                                             assignment.workspace_id)
+        protected = [cohort.cohort_number for cohort in cohorts
+                     if cohort.protected_group]
+        return diff_cohort_assignment(assignment, current, protected)
+
+    def _preflight_majors(self, assignment):
+        current = self._current_applications(self._client(AdSel),
+                                             assignment)
+        return diff_major_assignment(assignment, current)
+
+    @staticmethod
+    def _current_applications(client, assignment):
+        adsel_ids = [int(applicant.adsel_id)
+                     for applicant in assignment.applicants]
+        return client._get_live_apps_by_qtr_adselid_list(
+            assignment.quarter, adsel_ids, assignment.workspace_id)
+
+    def _post_bulk_assignment(self, url, assignment, diff=None):
+        """
+        Posts a bulk assignment, in chunks when assignment_chunk_size is
+        set.  Given a pre-flight diff, only its changes are submitted and
+        the diff is returned as the result's preflight; nothing is posted
+        when there are no changes.
+        """
+        if diff is not None:
+            if not len(diff.changes):
+                return {"response": None, "request": None, "preflight": diff}
+            assignment = copy.copy(assignment)
+            assignment.applicants = diff.changes
+        if self.assignment_chunk_size:
+            result = self._post_assignment_chunks(url, assignment)
+        else:
+            result = self._post_assignment(url, assignment)
+        if diff is not None:
+            result["preflight"] = diff
+        return result
+
+    def _post_assignment_chunks(self, url, assignment):
+        """
+        Submits an assignment as one request per assignment_chunk_size
+        applicants.  Each chunk is serialized on the calling thread while
+        up to assignment_workers earlier chunks are being posted.  The
+        response and request lists follow chunk order, with None for the
+        response of a failed chunk; failures describe each failed chunk
+        and failed_applicants lists the applicants that were not assigned.
+        """
+        size = self.assignment_chunk_size
+        applicants = assignment.applicants
+        chunks = [applicants[i:i + size]
+                  for i in range(0, len(applicants), size)]
+        if len(chunks) == 0:
+            chunks = [applicants]
+
+        requests = []
+        futures = []
+        with ThreadPoolExecutor(
+                max_workers=self.assignment_workers) as executor:
+            pending = set()
+            for chunk in chunks:
+                chunk_assignment = copy.copy(assignment)
+                chunk_assignment.applicants = chunk
+                request, body = self._serialize_assignment(chunk_assignment)
+                if len(pending) >= self.assignment_workers:
+                    done, pending = wait(pending,
+                                         return_when=FIRST_COMPLETED)
+                future = executor.submit(self._post_body, url, body)
+                pending.add(future)
+                futures.append(future)
+                requests.append(request)
+
+        responses = []
+        failures = []
+        for index, future in enumerate(futures):
+            try:
+                responses.append(future.result())
+            except DataFailureException as ex:
+                responses.append(None)
+                failures.append({"chunk": index,
+                                 "applicants": chunks[index],
+                                 "error": ex})
+        return {"response": responses,
+                "request": requests,
+                "failures": failures,
+                "failed_applicants": [applicant for failure in failures
+                                      for applicant in failure['applicants']]}
 
 
 class AdSelAzureMerge(AdSel):
@@ -622,13 +1252,20 @@ class AdSelAzureMerge(AdSel):
     The AdSel object has methods for interacting with endpoints
     deployed to azureapi for merging assignments
     """
-    def __init__(self):
+    def __init__(self, config={}):
         self.DAO = ADSEL_AZURE_MERGE_DAO()
+        self._configure(config)
 
     def get_with_body(self, url, body, headers={}):
         if headers == {}:
             headers = {'Content-Type': 'application/json'}
-        return self.DAO.get_with_body(url, body, headers)
+        start = time.perf_counter()
+        response = self._call_dao("GET", url, lambda: self.DAO.get_with_body(
+            url, body, headers))
+        self._record_request("GET", url, response,
+                             time.perf_counter() - start,
+                             body=json.dumps(body))
+        return response
 
     def check_conflict_cohort(self, from_workspace, to_workspace):
         url = "/ConflictCheck/Cohort"
@@ -645,7 +1282,18 @@ class AdSelAzureMerge(AdSel):
         return conflicts
 
     def get_conflict_details_cohort(self, from_workspace, to_workspace):
-        url = "/ConflictCheck/Details/Cohort"
+        return "".join(self.iter_conflict_details_cohort(from_workspace,
+                                                         to_workspace))
+
+    def iter_conflict_details_cohort(self, from_workspace, to_workspace):
+        """
+        Returns an iterator of CSV text chunks of the cohort conflict
+        details, suitable for a streaming response.
+        """
+        return self._iter_conflict_details("/ConflictCheck/Details/Cohort",
+                                           from_workspace, to_workspace)
+
+    def _iter_conflict_details(self, url, from_workspace, to_workspace):
         body = {
             "fromWorkspaceId": from_workspace,
             "toWorkspaceId": to_workspace
@@ -654,29 +1302,44 @@ class AdSelAzureMerge(AdSel):
         if response.status != 200:
             self._log_error(url, response)
             raise DataFailureException(url, response.status, response.data)
-        parsed_response = json.loads(response.data)
-        return self._get_conflict_csv(parsed_response)
+        data = response.data
+        if not data or data.strip() in (b"null", "null"):
+            return iter(())
+        return self._iter_conflict_csv(iter_json_array(
+            iter_chunks(data, STREAM_CHUNK_SIZE)))
 
     @staticmethod
     def _get_conflict_csv(conflict_json):
-        csv_output = io.StringIO()
+        return "".join(
+            AdSelAzureMerge._iter_conflict_csv(conflict_json or []))
 
-        if conflict_json:
-            trimmed = [
-                {k: v.strip() if isinstance(v, str)
-                    else v for k, v in row.items()}
-                for row in conflict_json
-            ]
-            writer = csv.DictWriter(csv_output,
-                                    fieldnames=trimmed[0].keys())
-            writer.writeheader()
-            writer.writerows(trimmed)
-        return csv_output.getvalue()
+    @staticmethod
+    def _iter_conflict_csv(rows, chunk_size=STREAM_CHUNK_SIZE):
+        # rows are trimmed and written one at a time into a buffer that is
+        # emptied every chunk_size characters
+        csv_output = io.StringIO()
+        writer = None
+        for row in rows:
+            trimmed = {k: v.strip() if isinstance(v, str) else v
+                       for k, v in row.items()}
+            if writer is None:
+                writer = csv.DictWriter(csv_output,
+                                        fieldnames=list(trimmed.keys()))
+                writer.writeheader()
+            writer.writerow(trimmed)
+            if csv_output.tell() >= chunk_size:
+                yield csv_output.getvalue()
+                csv_output.seek(0)
+                csv_output.truncate()
+        if csv_output.tell():
+            yield csv_output.getvalue()
 
     def merge_cohort(self, merge_object):
         url = "/Merge/Cohort"
         body = merge_object.to_json()
         response = self._post_resource(url, body)
+        self._invalidate_counts('merge_cohort',
+                                workspace_id=merge_object.to_ws_id)
         return response
 
     def check_conflict_major(self, from_workspace, to_workspace):
@@ -694,20 +1357,86 @@ class AdSelAzureMerge(AdSel):
         return conflicts
 
     def get_conflict_details_major(self, from_workspace, to_workspace):
-        url = "/ConflictCheck/Details/Major"
-        body = {
-            "fromWorkspaceId": from_workspace,
-            "toWorkspaceId": to_workspace
-        }
-        response = self.get_with_body(url, body)
-        if response.status != 200:
-            self._log_error(url, response)
-            raise DataFailureException(url, response.status, response.data)
-        parsed_response = json.loads(response.data)
-        return self._get_conflict_csv(parsed_response)
+        return "".join(self.iter_conflict_details_major(from_workspace,
+                                                        to_workspace))
+
+    def iter_conflict_details_major(self, from_workspace, to_workspace):
+        """
+        Returns an iterator of CSV text chunks of the major conflict
+        details, suitable for a streaming response.
+        """
+        return self._iter_conflict_details("/ConflictCheck/Details/Major",
+                                           from_workspace, to_workspace)
 
     def merge_major(self, merge_object):
         url = "/Merge/Major"
         body = merge_object.to_json()
         response = self._post_resource(url, body)
+        self._invalidate_counts('merge_major',
+                                workspace_id=merge_object.to_ws_id)
         return response
+
+    def local_conflicts(self, quarter_id, from_workspace, to_workspace):
+        """
+        Reads both workspaces' applications concurrently and returns a
+        ConflictEngine estimating the merge conflicts locally, without
+        /ConflictCheck requests.
+        """
+        client = self._client(AdSel)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            source, destination = executor.map(
+                lambda workspace_id: client.get_all_applications_by_qtr(
+                    quarter_id, workspace_id, compact=True),
+                (from_workspace, to_workspace))
+        return ConflictEngine(source, destination, from_workspace,
+                              to_workspace)
+
+    def plan_merges(self, pairs, categories=(COHORT, MAJOR)):
+        """
+        Runs the cohort and/or major conflict checks of each (from, to)
+        workspace pair concurrently, up to merge_workers at a time, and
+        returns them as a MergePlan.  A check that fails is recorded in
+        the plan's errors while the others are still returned.
+        """
+        checks = {COHORT: self.check_conflict_cohort,
+                  MAJOR: self.check_conflict_major}
+        plan = MergePlan()
+
+        def check(key):
+            category, from_workspace, to_workspace = key
+            try:
+                plan.conflicts[key] = checks[category](from_workspace,
+                                                       to_workspace)
+            except Exception as ex:
+                plan.errors[key] = ex
+
+        keys = [(category, from_workspace, to_workspace)
+                for from_workspace, to_workspace in pairs
+                for category in categories]
+        with ThreadPoolExecutor(max_workers=self.merge_workers) as executor:
+            list(executor.map(check, keys))
+        return plan
+
+    def merge_planned(self, plan, comments, user):
+        """
+        Submits the merges of every conflict free cohort and major in
+        plan, up to merge_workers at a time.  Returns the merges, their
+        responses (None for a merge that failed) and the failures.
+        """
+        merges = plan.merges(comments, user)
+        with ThreadPoolExecutor(max_workers=self.merge_workers) as executor:
+            futures = [executor.submit(
+                self.merge_cohort if isinstance(merge, CohortMerge)
+                else self.merge_major, merge) for merge in merges]
+
+        responses = []
+        failures = []
+        for merge, future in zip(merges, futures):
+            try:
+                responses.append(future.result())
+            except DataFailureException as ex:
+                responses.append(None)
+                failures.append({"merge": merge, "error": ex})
+        return {"merges": merges,
+                "response": responses,
+                "failures": failures}
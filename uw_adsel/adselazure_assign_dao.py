@@ -1,15 +1,9 @@
 """
 Contains UW AdSEL Azure Assign DAO implementations.
 """
-from restclients_core.dao import DAO
-from os.path import abspath, dirname
-import os
+from uw_adsel.dao import AdSelDAO
 
 
-class ADSEL_AZURE_ASSIGN_DAO(DAO):
+class ADSEL_AZURE_ASSIGN_DAO(AdSelDAO):
     def service_name(self):
         return 'adsel_azure_assign'
-
-    def service_mock_paths(self):
-        path = [abspath(os.path.join(dirname(__file__), "resources"))]
-        return path
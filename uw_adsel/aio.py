@@ -0,0 +1,88 @@
+"""
+asyncio interface for the AdSel clients.
+"""
+import asyncio
+import functools
+import inspect
+from restclients_core.exceptions import DataFailureException
+from uw_adsel import AdSel, AdSelAzureAssign, AdSelAzureMerge
+
+# returned by next() in place of StopIteration, which can't be raised
+# through a future
+_EXHAUSTED = object()
+
+
+class AsyncAdSel(object):
+    """
+    Exposes the methods of an AdSel client as coroutines with the same
+    arguments and return values, so independent calls can be gathered.
+    Each request runs on the DAO in an executor thread, which keeps the
+    restclients_core Live and Mock implementations usable unchanged.
+    Generator methods are exposed as async generators, advancing the
+    generator in the executor so that its requests stay off the loop.
+    """
+    client_class = AdSel
+
+    def __init__(self, config={}, executor=None):
+        self.client = self.client_class(config)
+        self.executor = executor
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        if inspect.isgeneratorfunction(attr):
+            @functools.wraps(attr)
+            async def generator(*args, **kwargs):
+                items = attr(*args, **kwargs)
+                try:
+                    while True:
+                        item = await self._run(next, items, _EXHAUSTED)
+                        if item is _EXHAUSTED:
+                            return
+                        yield item
+                finally:
+                    items.close()
+            return generator
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self._run(attr, *args, **kwargs)
+        return method
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs))
+
+    async def iter_activities(self, *args, **kwargs):
+        """
+        Asynchronously yields Activity objects across every page of the
+        activity log, requesting each page once the previous is consumed.
+        Yields nothing when no activity matches the filters (a 404).
+        """
+        client = self.client
+        url = "{}/activities".format(client.API)
+        filters = client._activity_filters(*args, **kwargs)
+        page = 1
+        while page is not None:
+            try:
+                response = await self._run(
+                    client._get_resource,
+                    client._page_url(url, filters, page))
+            except DataFailureException as ex:
+                if page == 1 and ex.status == 404:
+                    return
+                raise
+            for activity in client._activities_from_json(response):
+                yield activity
+            page = client._next_page(response, page)
+
+
+class AsyncAdSelAzureAssign(AsyncAdSel):
+    client_class = AdSelAzureAssign
+
+
+class AsyncAdSelAzureMerge(AsyncAdSel):
+    client_class = AdSelAzureMerge
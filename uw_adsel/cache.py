@@ -0,0 +1,69 @@
+"""
+Response caches used by the AdSel client for slowly changing reference data.
+"""
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class NoCache(object):
+    """
+    A cache implementation that never caches.
+    """
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def invalidate(self, match=None):
+        pass
+
+
+class TTLCache(object):
+    """
+    An in-process cache whose entries expire after a per-entry time to
+    live.  Once max_entries is reached the least recently used entry is
+    evicted.  Cached values are shared between callers and must be treated
+    as read-only.
+    """
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        if ttl <= 0 or value is None:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, match=None):
+        """
+        Drops the entries whose key satisfies match, or every entry when
+        match is None.
+        """
+        with self._lock:
+            if match is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
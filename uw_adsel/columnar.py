@@ -0,0 +1,143 @@
+"""
+Compact, column-oriented storage for large Application result sets.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from uw_adsel.models import Application
+
+# stands in for None in integer columns
+NULL_INT = -2 ** 63
+
+INT_COLUMNS = {
+    'adsel_id': 'admissionsSelectionId',
+    'application_number': 'applicationNbr',
+    'system_key': 'systemKey',
+    'campus': 'campus',
+    'quarter_id': 'academicQtrKeyId',
+    'assigned_cohort': 'assignedCohort',
+    'sdb_app_status': 'sdbApplicationStatus',
+}
+TEXT_COLUMNS = {
+    'assigned_major': 'assignedMajor',
+    'major_program_code': 'majorProgramCode',
+    'application_type': 'applicationType',
+}
+
+
+class ApplicationRow(namedtuple('ApplicationRow',
+                                list(INT_COLUMNS) + list(TEXT_COLUMNS))):
+    """
+    A lightweight, read-only view of one application in an
+    ApplicationTable, with the same attribute names as Application.
+    """
+    __slots__ = ()
+
+    def to_application(self):
+        return Application(**self._asdict())
+
+
+class ApplicationTable(object):
+    """
+    Holds applications column by column: integer fields in 64-bit arrays
+    and the low-cardinality text fields as indexes into a table of their
+    distinct values.  Rows are materialized as ApplicationRow tuples on
+    access, and can be converted back to Application models.
+    """
+    def __init__(self):
+        self._ints = {name: array('q') for name in INT_COLUMNS}
+        self._codes = {name: array('I') for name in TEXT_COLUMNS}
+        self._values = {name: [] for name in TEXT_COLUMNS}
+        self._value_codes = {name: {} for name in TEXT_COLUMNS}
+        self._indexes = {}
+
+    @classmethod
+    def from_json(cls, rows):
+        table = cls()
+        for row in rows:
+            table._append(row.get, INT_COLUMNS, TEXT_COLUMNS)
+        return table
+
+    @classmethod
+    def from_applications(cls, applications):
+        table = cls()
+        names = {name: name for name in INT_COLUMNS}
+        text_names = {name: name for name in TEXT_COLUMNS}
+        for application in applications:
+            table._append(lambda name: getattr(application, name, None),
+                          names, text_names)
+        return table
+
+    def _append(self, get, int_keys, text_keys):
+        for name, key in int_keys.items():
+            value = get(key)
+            self._ints[name].append(NULL_INT if value is None else value)
+        for name, key in text_keys.items():
+            value = get(key)
+            codes = self._value_codes[name]
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self._values[name])
+                self._values[name].append(value)
+            self._codes[name].append(code)
+        self._indexes.clear()
+
+    def __len__(self):
+        return len(self._ints['adsel_id'])
+
+    def __iter__(self):
+        columns = [self.column(name) for name in ApplicationRow._fields]
+        return (ApplicationRow._make(values) for values in zip(*columns))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return ApplicationRow._make(self._value(name, index)
+                                    for name in ApplicationRow._fields)
+
+    def _value(self, name, index):
+        if name in self._ints:
+            value = self._ints[name][index]
+            return None if value == NULL_INT else value
+        return self._values[name][self._codes[name][index]]
+
+    def column(self, name):
+        """
+        Returns the values of one column as a list.
+        """
+        if name in self._ints:
+            return [None if value == NULL_INT else value
+                    for value in self._ints[name]]
+        values = self._values[name]
+        return [values[code] for code in self._codes[name]]
+
+    def _index(self, name):
+        # Sorted keys plus the row position of each, built on first lookup
+        if name not in self._indexes:
+            keys = self._ints[name]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._indexes[name] = (array('q', (keys[i] for i in order)),
+                                   array('q', order))
+        return self._indexes[name]
+
+    def find(self, name, key):
+        """
+        Returns the rows whose integer column name equals key, in table
+        order.
+        """
+        keys, positions = self._index(name)
+        start = bisect_left(keys, key)
+        end = bisect_right(keys, key)
+        return [self[index] for index in sorted(positions[start:end])]
+
+    def get(self, adsel_id):
+        """
+        Returns the row for adsel_id, or None.
+        """
+        rows = self.find('adsel_id', adsel_id)
+        return rows[0] if len(rows) else None
+
+    def to_applications(self):
+        return [row.to_application() for row in self]
@@ -0,0 +1,132 @@
+"""
+Local estimates of merge conflicts between two workspaces, computed from
+their application snapshots.
+"""
+from collections import Counter
+from uw_adsel.models import CohortConflict, MajorConflict
+
+
+class ConflictEngine(object):
+    """
+    Computes the per cohort and per major conflict summaries of merging
+    the source workspace into the destination from their applications,
+    e.g. as returned by get_all_applications_by_qtr (Application models
+    or ApplicationTable rows), indexed by adsel_id.
+
+    A source cohort or major is counted as in conflict when one of its
+    applicants has a different cohort or major in the destination; the
+    application counts are those assigned the cohort or major in each
+    workspace.  These mirror /ConflictCheck/Cohort and
+    /ConflictCheck/Major, but are an estimate: confirm with the server
+    before merging.
+
+    update_source and update_destination apply changed applications,
+    adjusting the summaries in time proportional to the changes.
+    """
+    def __init__(self, source, destination, source_ws, destination_ws,
+                 source_ws_name=None, destination_ws_name=None):
+        self.source_ws = source_ws
+        self.source_ws_name = source_ws_name
+        self.destination_ws = destination_ws
+        self.destination_ws_name = destination_ws_name
+        # adsel_id -> (assigned cohort, major program code)
+        self._source = {}
+        self._destination = {}
+        self._counts = {"cohort": (Counter(), Counter(), Counter()),
+                        "major": (Counter(), Counter(), Counter())}
+        self.update_source(source)
+        self.update_destination(destination)
+
+    def update_source(self, applications):
+        """
+        Adds or replaces source applications, by adsel_id.
+        """
+        self._update(self._source, applications)
+
+    def update_destination(self, applications):
+        """
+        Adds or replaces destination applications, by adsel_id.
+        """
+        self._update(self._destination, applications)
+
+    def remove_source(self, adsel_ids):
+        self._remove(self._source, adsel_ids)
+
+    def remove_destination(self, adsel_ids):
+        self._remove(self._destination, adsel_ids)
+
+    def _update(self, side, applications):
+        for application in applications:
+            adsel_id = application.adsel_id
+            self._count(adsel_id, -1)
+            side[adsel_id] = (application.assigned_cohort,
+                              application.major_program_code or None)
+            self._count(adsel_id, 1)
+
+    def _remove(self, side, adsel_ids):
+        for adsel_id in adsel_ids:
+            if adsel_id in side:
+                self._count(adsel_id, -1)
+                del side[adsel_id]
+                self._count(adsel_id, 1)
+
+    def _count(self, adsel_id, sign):
+        # adds (or with sign -1, removes) one applicant's contribution
+        source = self._source.get(adsel_id, (None, None))
+        destination = self._destination.get(adsel_id, (None, None))
+        for position, category in enumerate(("cohort", "major")):
+            source_counts, destination_counts, conflicting = (
+                self._counts[category])
+            source_value = source[position]
+            destination_value = destination[position]
+            if source_value is not None:
+                source_counts[source_value] += sign
+                if destination_value not in (None, source_value):
+                    conflicting[source_value] += sign
+            if destination_value is not None:
+                destination_counts[destination_value] += sign
+
+    def cohort_conflicts(self):
+        """
+        Returns a CohortConflict for each cohort assigned in the source.
+        """
+        return CohortConflict.conflicts_from_response(
+            self._conflicts_json("cohort", "sourceAssignedCohort"))
+
+    def major_conflicts(self):
+        """
+        Returns a MajorConflict for each major assigned in the source.
+        """
+        return MajorConflict.conflicts_from_response(
+            self._conflicts_json("major", "majorCode"))
+
+    def _conflicts_json(self, category, key_name):
+        source_counts, destination_counts, conflicting = (
+            self._counts[category])
+        return [{key_name: key,
+                 "source_ws": self.source_ws,
+                 "source_ws_name": self.source_ws_name,
+                 "source_ws_applicationCount": source_counts[key],
+                 "destination_ws": self.destination_ws,
+                 "destination_ws_name": self.destination_ws_name,
+                 "dest_ws_applicationCount": destination_counts[key],
+                 "conflictStatus": conflicting[key] > 0}
+                for key in sorted(key for key, count in source_counts.items()
+                                  if count > 0)]
+
+
+def conflict_mismatches(local, server):
+    """
+    Returns the cohort numbers or major codes whose conflict status differs
+    between local conflicts and those returned by the server, including
+    any present in only one of them.
+    """
+    def statuses(conflicts):
+        return {conflict.source_cohort
+                if isinstance(conflict, CohortConflict)
+                else conflict.source_major: conflict.conflict_status
+                for conflict in conflicts}
+    local = statuses(local)
+    server = statuses(server)
+    return sorted(key for key in set(local) | set(server)
+                  if local.get(key) != server.get(key))
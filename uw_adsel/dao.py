@@ -1,15 +1,118 @@
 """
 Contains UW AdSEL DAO implementations.
 """
-from restclients_core.dao import DAO
+from restclients_core.dao import DAO, LiveDAO
 from os.path import abspath, dirname
+from threading import Lock
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import EmptyPoolError
 import os
+import socket
+import time
 
 
-class ADSEL_DAO(DAO):
-    def service_name(self):
-        return 'adsel'
+class PoolStats(object):
+    """
+    Usage counts for one service's connection pool: checkouts of a
+    connection, how many reused an open connection (hits) and how many
+    opened a new one, how many had to wait for a connection to be
+    returned and for how long in total, and how many gave up waiting.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.checkouts = 0
+        self.new_connections = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.exhausted = 0
+        self._lock = Lock()
+
+    @property
+    def hits(self):
+        return self.checkouts - self.new_connections
+
+    def as_dict(self):
+        with self._lock:
+            return {"maxsize": self.maxsize,
+                    "checkouts": self.checkouts,
+                    "hits": self.checkouts - self.new_connections,
+                    "new_connections": self.new_connections,
+                    "waits": self.waits,
+                    "wait_seconds": self.wait_seconds,
+                    "exhausted": self.exhausted}
+
+
+class PooledLiveDAO(LiveDAO):
+    """
+    The restclients_core Live implementation, with the pool of each
+    service tuned by the POOL_TIMEOUT and KEEPALIVE service settings and
+    its usage counted in a PoolStats.
+    """
+    def create_pool(self):
+        pool = super().create_pool()
+        pool_timeout = self.dao.get_service_setting("POOL_TIMEOUT")
+        if pool_timeout is not None:
+            pool_timeout = float(pool_timeout)
+        if str(self.dao.get_service_setting("KEEPALIVE", True)) != "False":
+            pool.conn_kw["socket_options"] = (
+                HTTPConnection.default_socket_options +
+                [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)])
+
+        stats = pool.adsel_stats = PoolStats(pool.pool.maxsize)
+        get_conn = pool._get_conn
+        new_conn = pool._new_conn
+
+        def counted_get_conn(timeout=None):
+            if pool_timeout is not None:
+                timeout = pool_timeout
+            waited = pool.pool is not None and pool.pool.empty()
+            start = time.monotonic()
+            try:
+                conn = get_conn(timeout=timeout)
+            except EmptyPoolError:
+                with stats._lock:
+                    stats.exhausted += 1
+                raise
+            with stats._lock:
+                stats.checkouts += 1
+                if waited:
+                    stats.waits += 1
+                    stats.wait_seconds += time.monotonic() - start
+            return conn
+
+        def counted_new_conn():
+            with stats._lock:
+                stats.new_connections += 1
+            return new_conn()
 
+        pool._get_conn = counted_get_conn
+        pool._new_conn = counted_new_conn
+        return pool
+
+
+def pool_stats():
+    """
+    Returns the PoolStats of each service's live connection pool, as
+    dicts keyed by service name.
+    """
+    return {service: pool.adsel_stats.as_dict()
+            for service, pool in list(LiveDAO.pools.items())
+            if hasattr(pool, "adsel_stats")}
+
+
+class AdSelDAO(DAO):
+    """
+    Base for the AdSel service DAOs.  Live requests share one pool per
+    service, sized by the POOL_SIZE setting.
+    """
     def service_mock_paths(self):
         path = [abspath(os.path.join(dirname(__file__), "resources"))]
         return path
+
+    def _get_live_implementation(self):
+        return PooledLiveDAO(self.service_name(), self)
+
+
+class ADSEL_DAO(AdSelDAO):
+    def service_name(self):
+        return 'adsel'
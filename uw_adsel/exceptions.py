@@ -1,3 +1,29 @@
 """
 Contains the custom exceptions used by the Zoom client.
 """
+from restclients_core.exceptions import DataFailureException
+
+
+class PartialFailureException(DataFailureException):
+    """
+    Raised when some chunks of a chunked bulk request fail.  The merged
+    results of the chunks that succeeded are kept in .results, and each
+    failed chunk is described in .failures by its index, the keys it
+    carried and the DataFailureException it raised.
+    """
+    def __init__(self, url, results, failures):
+        msg = "chunk(s) {} failed".format(
+            ", ".join(str(failure['chunk']) for failure in failures))
+        super().__init__(url, failures[0]['error'].status, msg)
+        self.results = results
+        self.failures = failures
+
+
+class CircuitOpenException(DataFailureException):
+    """
+    Raised without making a request while the circuit breaker of the
+    service is open.
+    """
+    def __init__(self, url, service):
+        super().__init__(url, 0, "circuit open for {}".format(service))
+        self.service = service
@@ -0,0 +1,61 @@
+"""
+Hashed indexes for filtering Application lists on the client.
+"""
+
+
+class ApplicationList(list):
+    """
+    A list of applications that also records the requested keys which
+    matched no application.
+    """
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.missing_keys = []
+
+
+class ApplicationIndex(object):
+    """
+    Indexes applications by a key attribute, such as system_key or
+    adsel_id, so each lookup is a single dict access.  Keys are compared
+    as integers, so "456340" and 456340 match the same applications.
+    """
+    def __init__(self, applications, key_attr):
+        self.key_attr = key_attr
+        self._index = {}
+        for application in applications:
+            key = _normalize(getattr(application, key_attr))
+            self._index.setdefault(key, []).append(application)
+
+    def __contains__(self, key):
+        return _normalize(key) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, key):
+        return self._index.get(_normalize(key), [])
+
+    def select(self, keys):
+        """
+        Returns the applications matching keys, in the order the keys were
+        given, with unmatched keys listed in missing_keys as given.
+        """
+        selected = ApplicationList()
+        seen = set()
+        for key in keys:
+            normalized = _normalize(key)
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+            if normalized in self._index:
+                selected.extend(self._index[normalized])
+            else:
+                selected.missing_keys.append(key)
+        return selected
+
+
+def _normalize(key):
+    try:
+        return int(key)
+    except (TypeError, ValueError):
+        return key
@@ -0,0 +1,102 @@
+"""
+Resumable bulk assignment jobs, checkpointed in a local journal file.
+"""
+import copy
+import json
+import os
+import time
+
+JOB_CHUNK_SIZE = 1000
+
+
+class AssignmentJob(object):
+    """
+    Submits an assignment through one of the client's assign_* methods in
+    chunks of chunk_size applicants.  Each acknowledged chunk is appended
+    to the journal at journal_path before the next is sent, so running
+    the job again with the same journal skips the applicants already
+    assigned.  before_chunk, if given, is called with the chunk index and
+    applicants before each chunk is submitted, and may raise to simulate a
+    failure.
+    """
+    def __init__(self, client, method, assignment, journal_path,
+                 chunk_size=JOB_CHUNK_SIZE, before_chunk=None):
+        self.client = client
+        self.method = method
+        self.assignment = assignment
+        self.journal_path = journal_path
+        self.chunk_size = chunk_size
+        self.before_chunk = before_chunk
+
+    def _header(self):
+        envelope = copy.copy(self.assignment)
+        envelope.applicants = []
+        return {"method": self.method, "assignment": envelope.json_data()}
+
+    def acknowledged(self):
+        """
+        Returns the adsel ids recorded as assigned in the journal.  A
+        partially written last line is ignored.
+        """
+        acknowledged = set()
+        if not os.path.exists(self.journal_path):
+            return acknowledged
+        with open(self.journal_path) as journal:
+            for number, line in enumerate(journal):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if number == 0:
+                    if entry != self._header():
+                        raise ValueError(
+                            "{} is the journal of a different assignment"
+                            .format(self.journal_path))
+                else:
+                    acknowledged.update(entry['adsel_ids'])
+        return acknowledged
+
+    def _append(self, entry):
+        with open(self.journal_path, "a") as journal:
+            journal.write(json.dumps(entry) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def run(self):
+        """
+        Submits the applicants not yet in the journal.  Returns the
+        request and response of each chunk sent, and the number of
+        applicants skipped as already assigned.
+        """
+        acknowledged = self.acknowledged()
+        if not os.path.exists(self.journal_path):
+            self._append(self._header())
+
+        remaining = [applicant for applicant in self.assignment.applicants
+                     if int(applicant.adsel_id) not in acknowledged]
+        chunks = [remaining[i:i + self.chunk_size]
+                  for i in range(0, len(remaining), self.chunk_size)]
+        submit = getattr(self.client, self.method)
+
+        requests = []
+        responses = []
+        for index, chunk in enumerate(chunks):
+            if self.before_chunk is not None:
+                self.before_chunk(index, chunk)
+            chunk_assignment = copy.copy(self.assignment)
+            chunk_assignment.applicants = chunk
+            result = submit(chunk_assignment)
+            failed = result.get("failed_applicants", [])
+            self._append({
+                "chunk": index,
+                "time": time.time(),
+                "adsel_ids": [int(applicant.adsel_id) for applicant in chunk
+                              if applicant not in failed]})
+            requests.append(result["request"])
+            responses.append(result["response"])
+            if len(failed):
+                raise result["failures"][0]["error"]
+
+        return {"request": requests,
+                "response": responses,
+                "skipped": len(self.assignment.applicants) - len(remaining)}
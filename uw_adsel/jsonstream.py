@@ -0,0 +1,88 @@
+"""
+Incremental decoding of large top-level JSON arrays.
+"""
+import codecs
+import json
+
+WHITESPACE = " \t\n\r"
+
+
+def iter_chunks(data, chunk_size):
+    """
+    Yields successive chunk_size slices of data without copying it.
+    """
+    view = memoryview(data) if isinstance(data, bytes) else data
+    for start in range(0, len(data), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+def iter_json_array(chunks):
+    """
+    Yields the elements of a top-level JSON array as soon as each one is
+    complete, reading the document from an iterable of bytes or str
+    chunks.  Only the undecoded tail of the document is buffered, so the
+    whole array is never held in memory as Python objects.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    decoder = json.JSONDecoder()
+    buffer = ""
+    state = "start"
+
+    for chunk in _with_final(chunks):
+        if chunk is None:
+            final = True
+            buffer += text_decoder.decode(b"", final=True)
+        else:
+            final = False
+            if not isinstance(chunk, str):
+                chunk = text_decoder.decode(chunk)
+            buffer += chunk
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                state = "value"
+                pos += 1
+            elif state == "end":
+                raise ValueError("Extra data after JSON array")
+            elif char == "]" and state in ("value", "comma"):
+                state = "end"
+                pos += 1
+            elif state == "comma":
+                if char != ",":
+                    raise ValueError(
+                        "Expected ',' or ']' in JSON array: {!r}".format(
+                            buffer[pos:pos + 20]))
+                state = "value"
+                pos += 1
+            else:
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                if not final and (end == len(buffer) or
+                                  buffer[end] not in WHITESPACE + ",]"):
+                    # a number may continue in the next chunk
+                    break
+                yield element
+                state = "comma"
+                pos = end
+        buffer = buffer[pos:]
+
+    if state != "end":
+        raise ValueError("Incomplete JSON array")
+
+
+def _with_final(chunks):
+    for chunk in chunks:
+        yield chunk
+    yield None
@@ -0,0 +1,80 @@
+"""
+Planning of cohort and major merges from the conflict checks of several
+workspace pairs.
+"""
+from collections import defaultdict
+from uw_adsel.models import CohortMerge, MajorMerge
+
+COHORT = "cohort"
+MAJOR = "major"
+
+
+class MergePlan(object):
+    """
+    The conflict checks of several (from, to) workspace pairs.  conflicts
+    maps each (category, from_ws, to_ws) check to the CohortConflict or
+    MajorConflict list it returned, and errors to the exception raised by
+    each check that failed.
+    """
+    def __init__(self):
+        self.conflicts = {}
+        self.errors = {}
+
+    def conflict_free(self):
+        """
+        Returns (category, from_ws, to_ws, key) for every cohort number or
+        major code whose check found no conflict, leaving out those
+        contested by another source.
+        """
+        contested = set(self.contested())
+        return [candidate for candidate in self._candidates()
+                if (candidate[0], candidate[2], candidate[3])
+                not in contested]
+
+    def contested(self):
+        """
+        Returns (category, to_ws, key) for every conflict free cohort
+        number or major code that more than one source would merge into
+        the same destination, as the merges would overwrite each other.
+        """
+        sources = defaultdict(set)
+        for category, from_ws, to_ws, key in self._candidates():
+            sources[(category, to_ws, key)].add(from_ws)
+        return sorted(target for target, from_ws in sources.items()
+                      if len(from_ws) > 1)
+
+    def _candidates(self):
+        # checks complete in any order; plan them in a stable one
+        for category, from_ws, to_ws in sorted(self.conflicts):
+            for conflict in self.conflicts[(category, from_ws, to_ws)]:
+                # a missing status is not taken as conflict free
+                if conflict.conflict_status is False:
+                    key = (conflict.source_cohort if category == COHORT
+                           else conflict.source_major)
+                    yield category, from_ws, to_ws, key
+
+    def merges(self, comments, user):
+        """
+        Returns a CohortMerge or MajorMerge for each conflict free entry.
+        """
+        merges = []
+        for category, from_ws, to_ws, key in self.conflict_free():
+            if category == COHORT:
+                merges.append(CohortMerge(
+                    from_ws_id=from_ws, to_ws_id=to_ws, cohort_number=key,
+                    comments=comments, user=user))
+            else:
+                merges.append(MajorMerge(
+                    from_ws_id=from_ws, to_ws_id=to_ws, major_code=key,
+                    comments=comments, user=user))
+        return merges
+
+    def summary(self):
+        conflicting = sum(1 for conflicts in self.conflicts.values()
+                          for conflict in conflicts
+                          if conflict.conflict_status is not False)
+        return {"checks": len(self.conflicts) + len(self.errors),
+                "failed_checks": len(self.errors),
+                "conflicting": conflicting,
+                "contested": len(self.contested()),
+                "conflict_free": len(self.conflict_free())}
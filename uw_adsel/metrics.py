@@ -0,0 +1,263 @@
+"""
+Request metrics hooks for the AdSel clients, with an in-memory histogram
+collector and a Prometheus text exporter.
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+from threading import Lock
+import re
+
+# upper bounds of the latency and size histogram buckets
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+BYTES_BUCKETS = tuple(256 * 4 ** i for i in range(10))
+ROWS_BUCKETS = tuple(10 ** i for i in range(7))
+
+# circuit breaker states as reported by the adsel_circuit_state gauge
+CIRCUIT_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+# name: (type, help, histogram buckets)
+METRICS = OrderedDict([
+    ('adsel_request_duration_seconds',
+     ('histogram', "Time spent on AdSel requests, by phase",
+      SECONDS_BUCKETS)),
+    ('adsel_request_size_bytes',
+     ('histogram', "Size of AdSel request bodies", BYTES_BUCKETS)),
+    ('adsel_response_size_bytes',
+     ('histogram', "Size of AdSel response bodies", BYTES_BUCKETS)),
+    ('adsel_hydrate_duration_seconds',
+     ('histogram', "Time spent building models from AdSel responses",
+      SECONDS_BUCKETS)),
+    ('adsel_hydrate_rows',
+     ('histogram', "Models built per AdSel response", ROWS_BUCKETS)),
+    ('adsel_retries_total',
+     ('counter', "AdSel requests retried, by the status that failed",
+      None)),
+    ('adsel_circuit_rejected_total',
+     ('counter', "AdSel calls failed fast by an open circuit", None)),
+    ('adsel_circuit_state',
+     ('gauge', "AdSel circuit breaker state: 0 closed, 1 half open, "
+      "2 open", None)),
+])
+
+
+# path segments that hold a key other than a number
+KEY_SEGMENTS = [
+    (re.compile(r"(/majors/details/[^/]+/)[^/]+$"), r"\1{code}"),
+]
+
+
+def url_template(url):
+    """
+    Returns the path of url with numeric segments replaced by {id}, major
+    program codes by {code} and the query string dropped, so calls to the
+    same endpoint share one set of metrics.
+    """
+    path = url.split("?", 1)[0]
+    for pattern, replacement in KEY_SEGMENTS:
+        path = pattern.sub(replacement, path)
+    return re.sub(r"(?<=/)-?\d+(?=/|$)", "{id}", path)
+
+
+def body_size(body):
+    """
+    Returns the size in bytes of a request or response body.
+    """
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body) if body.isascii() else len(body.encode('utf-8'))
+    return len(body)
+
+
+class NoMetrics(object):
+    """
+    A metrics hook that records nothing.  Hooks receive each request's
+    method, URL template, HTTP status, network and parse time in seconds
+    (parse is None when the body is not parsed) and body sizes, the
+    time and row count of each hydration of a response into models, each
+    retried request, and each service's circuit breaker state after a
+    call, with whether the call was rejected by an open circuit.
+    """
+    def record_request(self, method, endpoint, status, network, parse,
+                       request_bytes, response_bytes):
+        pass
+
+    def record_hydrate(self, endpoint, seconds, rows):
+        pass
+
+    def record_retry(self, method, endpoint, status):
+        pass
+
+    def record_circuit(self, service, state, rejected=False):
+        pass
+
+
+class Histogram(object):
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """
+        Returns (upper bound, count of observations <= bound) pairs, the
+        last bound being +Inf.
+        """
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float("inf"),),
+                                self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class MetricsCollector(NoMetrics):
+    """
+    Keeps a histogram per metric and label set in memory.  Safe to share
+    between threads and clients.
+    """
+    def __init__(self):
+        self._histograms = OrderedDict()
+        self._values = OrderedDict()
+        self._lock = Lock()
+
+    def record_request(self, method, endpoint, status, network, parse,
+                       request_bytes, response_bytes):
+        labels = (('method', method), ('endpoint', endpoint),
+                  ('status', str(status)))
+        with self._lock:
+            self._observe('adsel_request_duration_seconds',
+                          labels + (('phase', 'network'),), network)
+            if parse is not None:
+                self._observe('adsel_request_duration_seconds',
+                              labels + (('phase', 'parse'),), parse)
+            self._observe('adsel_request_size_bytes', labels[:2],
+                          request_bytes)
+            self._observe('adsel_response_size_bytes', labels,
+                          response_bytes)
+
+    def record_hydrate(self, endpoint, seconds, rows):
+        labels = (('endpoint', endpoint),)
+        with self._lock:
+            self._observe('adsel_hydrate_duration_seconds', labels, seconds)
+            self._observe('adsel_hydrate_rows', labels, rows)
+
+    def record_retry(self, method, endpoint, status):
+        labels = (('method', method), ('endpoint', endpoint),
+                  ('status', str(status)))
+        with self._lock:
+            key = ('adsel_retries_total', labels)
+            self._values[key] = self._values.get(key, 0) + 1
+
+    def record_circuit(self, service, state, rejected=False):
+        labels = (('service', service),)
+        with self._lock:
+            self._values[('adsel_circuit_state', labels)] = \
+                CIRCUIT_STATES[state]
+            if rejected:
+                key = ('adsel_circuit_rejected_total', labels)
+                self._values[key] = self._values.get(key, 0) + 1
+
+    def _observe(self, name, labels, value):
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(METRICS[name][2])
+        histogram.observe(value)
+
+    def value(self, name, **labels):
+        """
+        Returns the value of a counter or gauge for exactly the given
+        labels, or None if nothing was recorded for them.
+        """
+        with self._lock:
+            return self._values.get((name, tuple(labels.items())))
+
+    def histogram(self, name, **labels):
+        """
+        Returns the histogram of a metric for exactly the given labels, or
+        None if nothing was recorded for them.
+        """
+        with self._lock:
+            for (key_name, key_labels), histogram in \
+                    self._histograms.items():
+                if key_name == name and dict(key_labels) == labels:
+                    return histogram
+        return None
+
+    def histograms(self):
+        """
+        Returns a snapshot of (name, labels, histogram) for every recorded
+        label set.
+        """
+        with self._lock:
+            return [(name, labels, histogram)
+                    for (name, labels), histogram in self._histograms.items()]
+
+    def values(self):
+        """
+        Returns a snapshot of (name, labels, value) for every counter and
+        gauge label set.
+        """
+        with self._lock:
+            return [(name, labels, value)
+                    for (name, labels), value in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._values.clear()
+
+
+def prometheus_text(collector):
+    """
+    Renders the metrics of a MetricsCollector in the Prometheus text
+    exposition format.
+    """
+    by_name = OrderedDict((name, []) for name in METRICS)
+    for name, labels, value in collector.histograms() + collector.values():
+        by_name[name].append((labels, value))
+
+    lines = []
+    for name, series in by_name.items():
+        if not len(series):
+            continue
+        kind, help_text, _ = METRICS[name]
+        lines.append("# HELP {} {}".format(name, help_text))
+        lines.append("# TYPE {} {}".format(name, kind))
+        if kind != 'histogram':
+            for labels, value in series:
+                lines.append("{}{} {}".format(name, _label_text(labels),
+                                              _number(value)))
+            continue
+        for labels, histogram in series:
+            for bound, count in histogram.cumulative_counts():
+                lines.append("{}_bucket{} {}".format(
+                    name, _label_text(labels + (('le', _number(bound)),)),
+                    count))
+            lines.append("{}_sum{} {}".format(name, _label_text(labels),
+                                              _number(histogram.sum)))
+            lines.append("{}_count{} {}".format(name, _label_text(labels),
+                                                histogram.count))
+    return "".join(line + "\n" for line in lines)
+
+
+def _label_text(labels):
+    return "{" + ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\")
+                         .replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
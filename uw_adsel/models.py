@@ -1,4 +1,96 @@
 from restclients_core import models
+from operator import itemgetter
+import copy
+import io
+import json
+import weakref
+
+
+class FieldMap(object):
+    """
+    Builds instances of a restclients_core model from JSON rows in bulk.
+    The storage key of each field is resolved once up front, so each
+    instance is populated with a single dict instead of a descriptor call
+    per attribute.  fields maps attribute names to the JSON keys every row
+    must have, optional_fields to JSON keys that may be absent.
+
+    The storage keys and instance state are restclients_core internals;
+    when a probe model can't be built that way, instances are created
+    with normal attribute assignment instead.
+    """
+    def __init__(self, model, fields, optional_fields={}):
+        self.model = model
+        self.getter = itemgetter(*fields.values())
+        self.fast = FAST_HYDRATE
+        if self.fast:
+            self.keys = [self._storage_key(attr) for attr in fields]
+            self.optional = [(self._storage_key(attr), json_key)
+                             for attr, json_key in optional_fields.items()]
+            self.refs = [weakref.ref(self._field(attr))
+                         for attr in list(fields) + list(optional_fields)]
+        else:
+            self.keys = list(fields)
+            self.optional = list(optional_fields.items())
+
+    def _field(self, attr):
+        for cls in self.model.__mro__:
+            if attr in cls.__dict__:
+                return cls.__dict__[attr]
+        raise AttributeError(attr)
+
+    def _storage_key(self, attr):
+        field = self._field(attr)
+        return field._key_for_instance(field)
+
+    def hydrate(self, rows):
+        return list(self.iter_hydrate(rows))
+
+    def iter_hydrate(self, rows):
+        model = self.model
+        keys = self.keys
+        getter = self.getter
+        optional = self.optional
+        fast = self.fast
+        refs = self.refs if fast else None
+        for row in rows:
+            values = dict(zip(keys, getter(row)))
+            for key, json_key in optional:
+                if json_key in row:
+                    values[key] = row[json_key]
+            if not fast:
+                yield model(**values)
+                continue
+            instance = model.__new__(model)
+            instance.__dict__.update(initialized=True,
+                                     _field_values=values,
+                                     _dynamic_fields=set(refs))
+            yield instance
+
+
+def _supports_fast_hydrate():
+    """
+    Whether a model built the way FieldMap.iter_hydrate builds it matches
+    one built by its constructor, with this version of restclients_core.
+    """
+    class Probe(models.Model):
+        value = models.IntegerField()
+        text = models.CharField(max_length=8)
+
+    try:
+        field = Probe.__dict__['value']
+        instance = Probe.__new__(Probe)
+        instance.__dict__.update(
+            initialized=True,
+            _field_values={field._key_for_instance(field): 1},
+            _dynamic_fields=set([weakref.ref(field)]))
+        expected = Probe(value=1)
+        return (instance.__dict__ == expected.__dict__ and
+                instance.value == 1 and instance.text == expected.text)
+    except Exception:
+        return False
+
+
+FAST_HYDRATE = _supports_fast_hydrate()
 
 
 class Major(models.Model):
@@ -112,6 +204,35 @@ class Assignment(models.Model):
     user = models.CharField(max_length=12)
     applicants = []
     workspace_id = models.IntegerField()
+    applicants_key = 'applicants'
+
+    def applicant_json_data(self, application):
+        return application.json_data()
+
+    def json_bytes(self):
+        """
+        Returns the same bytes as json.dumps(self.json_data()) encoded as
+        UTF-8, writing each applicant straight into the output buffer
+        instead of building the list of applicant dicts and the full JSON
+        string first.
+        """
+        envelope = copy.copy(self)
+        envelope.applicants = []
+        placeholder = '"{}": []'.format(self.applicants_key)
+        prefix, _, suffix = json.dumps(envelope.json_data()).partition(
+            placeholder)
+
+        buffer = io.BytesIO()
+        buffer.write('{}"{}": ['.format(prefix,
+                                        self.applicants_key).encode('utf-8'))
+        separator = b""
+        for application in self.applicants:
+            buffer.write(separator)
+            buffer.write(json.dumps(
+                self.applicant_json_data(application)).encode('utf-8'))
+            separator = b", "
+        buffer.write(']{}'.format(suffix).encode('utf-8'))
+        return buffer.getvalue()
 
 
 class CohortAssignment(Assignment):
@@ -138,6 +259,10 @@ class CohortAssignment(Assignment):
 
 class MajorAssignment(Assignment):
     major_code = models.CharField()
+    applicants_key = 'Applicants'
+
+    def applicant_json_data(self, application):
+        return application.major_assign_json_data()
 
     def json_data(self):
         applicant_json = []
@@ -158,6 +283,8 @@ class MajorAssignment(Assignment):
 
 
 class PurpleGoldAssignment(Assignment):
+    applicants_key = 'Applicants'
+
     def json_data(self):
         applicant_json = []
         for application in self.applicants:
@@ -366,3 +493,25 @@ class MajorMerge(Merge):
         data = super().to_json()
         data['majorProgramCode'] = self.major_code
         return data
+
+
+class QuarterSnapshot(object):
+    """
+    The majors, cohorts, decisions, workspaces and filter values for one
+    quarter and workspace, read together.  timings holds the seconds each
+    component took, and errors the exception raised by each component that
+    failed, whose value is left as None.
+    """
+    COMPONENTS = ['majors', 'cohorts', 'decisions', 'workspaces',
+                  'static_filters', 'dynamic_filters']
+
+    def __init__(self, quarter_id, workspace_id):
+        self.quarter_id = quarter_id
+        self.workspace_id = workspace_id
+        for component in self.COMPONENTS:
+            setattr(self, component, None)
+        self.timings = {}
+        self.errors = {}
+
+    def is_complete(self):
+        return len(self.errors) == 0
@@ -0,0 +1,292 @@
+"""
+Plans bulk cohort and major assignments from tabular applicant data.
+"""
+from array import array
+from collections import OrderedDict
+import csv
+from uw_adsel.columnar import NULL_INT
+from uw_adsel.models import Application, CohortAssignment, MajorAssignment
+
+KEY_COLUMNS = ('adsel_id', 'system_key', 'application_number')
+OPTIONAL_INT_COLUMNS = ('sdb_app_status',)
+OPTIONAL_TEXT_COLUMNS = ('application_type',)
+# problems listed in a validation error before the rest are counted
+MAX_REPORTED_ERRORS = 10
+
+
+class ApplicantColumns(object):
+    """
+    Applicant keys held column by column in 64-bit arrays, with an
+    optional target column giving the cohort number or major code each
+    applicant is assigned to.  Columns may be any sequence, including
+    array.array and NumPy arrays; every column is validated when the
+    object is built, and a ValueError lists the rows that are not
+    integers, are missing or repeat an adsel_id.
+    """
+    def __init__(self, adsel_id, system_key, application_number,
+                 target=None, application_type=None, sdb_app_status=None):
+        errors = []
+        length = len(adsel_id)
+        self.adsel_id = _int_column('adsel_id', adsel_id, errors)
+        self.system_key = _int_column('system_key', system_key, errors)
+        self.application_number = _int_column(
+            'application_number', application_number, errors)
+        self.sdb_app_status = None
+        if sdb_app_status is not None:
+            self.sdb_app_status = _int_column(
+                'sdb_app_status', sdb_app_status, errors, nullable=True)
+        self.application_type = None
+        if application_type is not None:
+            self.application_type = [value or None
+                                     for value in _values(application_type)]
+        self.target = None
+        if target is not None:
+            self.target = list(_values(target))
+            errors.extend("row {}: missing target".format(row)
+                          for row, value in enumerate(self.target)
+                          if value is None or value == "")
+
+        for name in ('system_key', 'application_number', 'sdb_app_status',
+                     'application_type', 'target'):
+            column = getattr(self, name)
+            if column is not None and len(column) != length:
+                errors.append("{} has {} rows, expected {}".format(
+                    name, len(column), length))
+        errors.extend(_duplicate_errors(self.adsel_id))
+        _raise_errors(errors)
+
+    @classmethod
+    def from_csv(cls, csvfile, target_column=None, **fmtparams):
+        """
+        Reads the columns from an open CSV file whose header names the
+        adsel_id, system_key and application_number columns, and
+        optionally application_type, sdb_app_status and target_column.
+        Other columns are ignored.
+        """
+        reader = csv.reader(csvfile, **fmtparams)
+        header = [name.strip() for name in next(reader, [])]
+        missing = [name for name in KEY_COLUMNS + (target_column,)
+                   if name is not None and name not in header]
+        if len(missing):
+            raise ValueError("CSV has no {} column".format(
+                ", ".join(missing)))
+
+        names = [name for name in KEY_COLUMNS + OPTIONAL_INT_COLUMNS +
+                 OPTIONAL_TEXT_COLUMNS + (target_column,)
+                 if name is not None and name in header]
+        positions = [header.index(name) for name in names]
+        columns = {name: [] for name in names}
+        appends = [columns[name].append for name in names]
+        for row in reader:
+            if not len(row):
+                continue
+            for append, position in zip(appends, positions):
+                append(row[position].strip() if position < len(row) else "")
+
+        if target_column is not None:
+            columns['target'] = columns.pop(target_column)
+        return cls(**columns)
+
+    def __len__(self):
+        return len(self.adsel_id)
+
+    def batch(self, rows=None):
+        """
+        Returns an ApplicantBatch over rows, or over every row.
+        """
+        if rows is None:
+            rows = array('q', range(len(self)))
+        return ApplicantBatch(self, rows)
+
+    def group_by_target(self, convert=None):
+        """
+        Returns an OrderedDict of ApplicantBatch keyed by target value, in
+        the order each target first appears.  convert, if given, is
+        applied to every distinct target value and may raise ValueError.
+        """
+        if self.target is None:
+            raise ValueError("No target column to group applicants by")
+        groups = OrderedDict()
+        for row, value in enumerate(self.target):
+            rows = groups.get(value)
+            if rows is None:
+                rows = groups[value] = array('q')
+            rows.append(row)
+
+        batches = OrderedDict()
+        errors = []
+        for value, rows in groups.items():
+            key = value
+            if convert is not None:
+                try:
+                    key = convert(value)
+                except ValueError:
+                    errors.append("rows {}: invalid target {!r}".format(
+                        _row_list(rows), value))
+                    continue
+            if key in batches:
+                batches[key] = self.batch(array(
+                    'q', sorted(batches[key].rows + rows)))
+            else:
+                batches[key] = self.batch(rows)
+        _raise_errors(errors)
+        return batches
+
+    def application(self, row):
+        """
+        Returns an Application for one row.
+        """
+        values = {'adsel_id': self.adsel_id[row],
+                  'system_key': self.system_key[row],
+                  'application_number': self.application_number[row]}
+        if self.sdb_app_status is not None:
+            status = self.sdb_app_status[row]
+            values['sdb_app_status'] = None if status == NULL_INT else status
+        if self.application_type is not None:
+            values['application_type'] = self.application_type[row]
+        return Application(**values)
+
+
+class ApplicantBatch(object):
+    """
+    A sequence of the rows of an ApplicantColumns, used as the applicants
+    of a planned assignment.  Application objects are created only as the
+    batch is iterated, which happens when the assignment is serialized,
+    and slicing returns another batch.
+    """
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        application = self.columns.application
+        return (application(row) for row in self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ApplicantBatch(self.columns, self.rows[index])
+        return self.columns.application(self.rows[index])
+
+    @property
+    def adsel_ids(self):
+        adsel_id = self.columns.adsel_id
+        return array('q', (adsel_id[row] for row in self.rows))
+
+
+def plan_cohort_assignments(columns, cohort_number=None, **details):
+    """
+    Returns one CohortAssignment per target cohort in columns, or a single
+    assignment to cohort_number when columns has no target column.  The
+    remaining keyword arguments are set on every assignment.
+    """
+    return _plan(CohortAssignment, 'cohort_number', int, columns,
+                 cohort_number, details)
+
+
+def plan_major_assignments(columns, major_code=None, **details):
+    """
+    Returns one MajorAssignment per target major code in columns, or a
+    single assignment to major_code when columns has no target column.
+    The remaining keyword arguments are set on every assignment.
+    """
+    return _plan(MajorAssignment, 'major_code', _major_code, columns,
+                 major_code, details)
+
+
+def _plan(assignment_class, target_attr, convert, columns, target, details):
+    if columns.target is None:
+        if target is None:
+            raise ValueError("{} is required without a target column"
+                             .format(target_attr))
+        batches = {target: columns.batch()}
+    elif target is not None:
+        raise ValueError("{} conflicts with the target column"
+                         .format(target_attr))
+    else:
+        batches = columns.group_by_target(convert)
+
+    assignments = []
+    for value, batch in batches.items():
+        assignment = assignment_class(**details)
+        setattr(assignment, target_attr, value)
+        assignment.applicants = batch
+        assignments.append(assignment)
+    return assignments
+
+
+def _major_code(value):
+    code = str(value).strip()
+    if not len(code):
+        raise ValueError(value)
+    return code
+
+
+def _values(column):
+    # NumPy arrays convert to a list of Python scalars in one call
+    return column.tolist() if hasattr(column, 'tolist') else column
+
+
+def _int_column(name, column, errors, nullable=False):
+    values = _values(column)
+    try:
+        if nullable:
+            return array('q', (NULL_INT if value is None or value == ""
+                               else _int(value) for value in values))
+        return array('q', (_int(value) for value in values))
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    # find every invalid value only once the fast path has failed
+    converted = array('q')
+    for row, value in enumerate(values):
+        if nullable and (value is None or value == ""):
+            converted.append(NULL_INT)
+            continue
+        try:
+            converted.append(_int(value))
+        except (TypeError, ValueError, OverflowError):
+            errors.append("row {}: {} {!r} is not an integer".format(
+                row, name, value))
+            converted.append(NULL_INT)
+    return converted
+
+
+def _int(value):
+    if type(value) is int:
+        return value
+    # int() would take a bool as 0 or 1 and truncate a fractional float
+    if isinstance(value, bool) or (isinstance(value, float) and
+                                   value != int(value)):
+        raise ValueError(value)
+    return int(value)
+
+
+def _duplicate_errors(adsel_ids):
+    order = sorted(range(len(adsel_ids)), key=adsel_ids.__getitem__)
+    errors = []
+    start = 0
+    while start < len(order):
+        end = start + 1
+        key = adsel_ids[order[start]]
+        while end < len(order) and adsel_ids[order[end]] == key:
+            end += 1
+        if end - start > 1 and key != NULL_INT:
+            errors.append("rows {}: duplicate adsel_id {}".format(
+                _row_list(sorted(order[start:end])), key))
+        start = end
+    return errors
+
+
+def _row_list(rows):
+    return ", ".join(str(row) for row in rows)
+
+
+def _raise_errors(errors):
+    if len(errors) > MAX_REPORTED_ERRORS:
+        errors = errors[:MAX_REPORTED_ERRORS] + [
+            "and {} more".format(len(errors) - MAX_REPORTED_ERRORS)]
+    if len(errors):
+        raise ValueError("Invalid applicants: {}".format("; ".join(errors)))
@@ -0,0 +1,69 @@
+"""
+Pre-flight comparison of bulk assignments against current workspace state.
+"""
+from uw_adsel.index import ApplicationIndex
+
+
+class AssignmentDiff(object):
+    """
+    Splits the applicants of an assignment into the changes that need to
+    be submitted, the applicants already assigned to the target, those
+    whose current cohort is protected and would not be overridden, and
+    those not found in the workspace.
+    """
+    def __init__(self):
+        self.changes = []
+        self.unchanged = []
+        self.protected = []
+        self.unknown = []
+
+    def summary(self):
+        return {"changes": len(self.changes),
+                "unchanged": len(self.unchanged),
+                "protected": len(self.protected),
+                "unknown": len(self.unknown)}
+
+
+def diff_cohort_assignment(assignment, current, protected_cohorts=()):
+    """
+    Compares a CohortAssignment with current, the applications in its
+    workspace.  Applicants currently in one of protected_cohorts are
+    reported as protected unless the assignment overrides protected
+    cohorts.
+    """
+    protected_cohorts = set(protected_cohorts)
+    target = int(assignment.cohort_number)
+
+    def classify(applicant, application):
+        cohort = application.assigned_cohort
+        if cohort == target:
+            return "unchanged"
+        if (cohort in protected_cohorts and
+                not assignment.override_protected):
+            return "protected"
+        return "changes"
+    return _diff(assignment, current, classify)
+
+
+def diff_major_assignment(assignment, current):
+    """
+    Compares a MajorAssignment with current, the applications in its
+    workspace, by major program code.
+    """
+    def classify(applicant, application):
+        if application.major_program_code == assignment.major_code:
+            return "unchanged"
+        return "changes"
+    return _diff(assignment, current, classify)
+
+
+def _diff(assignment, current, classify):
+    index = ApplicationIndex(current, 'adsel_id')
+    diff = AssignmentDiff()
+    for applicant in assignment.applicants:
+        matches = index.get(int(applicant.adsel_id))
+        if not len(matches):
+            diff.unknown.append(applicant)
+            continue
+        getattr(diff, classify(applicant, matches[0])).append(applicant)
+    return diff
@@ -0,0 +1,122 @@
+"""
+Retry and circuit breaking for AdSel DAO calls.
+"""
+from threading import Lock
+import random
+import time
+
+# statuses that count as a service failure; 0 is a connection error or
+# timeout reported by the Live DAO
+FAILURE_STATUSES = (0, 429, 500, 502, 503, 504)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+
+class RetryPolicy(object):
+    """
+    Retries a failed GET up to retries more times, waiting a random time
+    between zero and backoff * 2 ** attempt seconds, capped at
+    max_backoff ("full jitter").  A Retry-After header on the failed
+    response raises the wait to that many seconds, within max_backoff.
+    """
+    def __init__(self, retries=2, backoff=0.2, max_backoff=5.0,
+                 statuses=FAILURE_STATUSES):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+
+    def should_retry(self, attempt, status):
+        return attempt < self.retries and status in self.statuses
+
+    def delay(self, attempt, response=None):
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = _retry_after(response)
+        if retry_after is not None:
+            delay = max(delay, min(self.max_backoff, retry_after))
+        return delay
+
+
+class CircuitBreaker(object):
+    """
+    Opens after failure_threshold consecutive failures, failing calls fast
+    for reset_timeout seconds.  A single trial call is then let through
+    (half open): success closes the circuit and failure opens it again.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = Lock()
+
+    def allow_call(self):
+        """
+        Returns whether a call may be made now.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if (self.state == HALF_OPEN or
+                    self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+class CircuitBreakers(object):
+    """
+    Holds one CircuitBreaker per AdSel service.  Pass the same instance
+    to every client so that clients of a service share its breaker.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = Lock()
+
+    def get(self, service):
+        with self._lock:
+            breaker = self._breakers.get(service)
+            if breaker is None:
+                breaker = self._breakers[service] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def states(self):
+        with self._lock:
+            return {service: breaker.state
+                    for service, breaker in self._breakers.items()}
+
+
+def _retry_after(response):
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
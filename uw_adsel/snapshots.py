@@ -0,0 +1,199 @@
+"""
+Incrementally refreshed copies of workspace application sets.
+"""
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from uw_adsel.models import CohortAssignment, MajorAssignment
+import time
+
+# seconds between full re-reads of a workspace, as a consistency check
+FULL_SYNC_INTERVAL = 3600
+# activities are re-read from this long before the last sync, to allow
+# for clock skew and activities recorded while the sync ran
+ACTIVITY_OVERLAP = timedelta(minutes=5)
+
+FULL = "full"
+DELTA = "delta"
+UNCHANGED = "unchanged"
+
+
+class WorkspaceSnapshot(object):
+    """
+    The applications of one quarter and workspace, by system key, with
+    the applicants changed since they were read and the activities
+    already applied.
+    """
+    def __init__(self, quarter_id, workspace_id):
+        self.quarter_id = quarter_id
+        self.workspace_id = workspace_id
+        self.applications = {}
+        self.pending = []
+        self.seen_imports = {}
+        # wall clock start of the last sync and of the last full read, and
+        # the monotonic time of the full read
+        self.synced_at = None
+        self.read_at = None
+        self.full_sync_at = None
+        self.lock = Lock()
+
+    def applications_list(self):
+        return [application for applications in self.applications.values()
+                for application in applications]
+
+
+class SnapshotStore(object):
+    """
+    Keeps the last application set read for each (quarter, workspace)
+    and refreshes it from the activity log instead of re-reading every
+    application.
+
+    Activities carry no applicant keys, so the applicants of assignments
+    made through record_assignment are remembered until a sync.  A sync
+    reads the workspace's activities since the previous one; when each
+    new activity matches a recorded assignment by user and target, only
+    those applicants are re-read through the SystemKeys endpoint.  An
+    activity that matches none, or a snapshot older than
+    full_sync_interval seconds, re-reads the whole workspace.
+    """
+    def __init__(self, client, full_sync_interval=FULL_SYNC_INTERVAL):
+        self.client = client
+        self.full_sync_interval = full_sync_interval
+        self._snapshots = {}
+        self._lock = Lock()
+
+    def _snapshot(self, quarter_id, workspace_id):
+        key = (quarter_id, workspace_id)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                snapshot = self._snapshots[key] = WorkspaceSnapshot(
+                    quarter_id, workspace_id)
+            return snapshot
+
+    def get_applications(self, quarter_id, workspace_id):
+        """
+        Returns the workspace's applications, reading them on first use.
+        """
+        snapshot = self._snapshot(quarter_id, workspace_id)
+        if snapshot.synced_at is None:
+            self.sync(quarter_id, workspace_id)
+        return snapshot.applications_list()
+
+    def record_assignment(self, assignment):
+        """
+        Remembers the applicants of an assignment submitted to the
+        assignment's quarter and workspace, to be re-read by the next
+        sync.
+        """
+        snapshot = self._snapshot(assignment.quarter,
+                                  assignment.workspace_id)
+        snapshot.pending.append(assignment)
+
+    def sync(self, quarter_id, workspace_id, full=False):
+        """
+        Brings the snapshot up to date, returning how: FULL, DELTA or
+        UNCHANGED, the number of new activities, and the numbers of
+        applicants re-read and removed.
+        """
+        snapshot = self._snapshot(quarter_id, workspace_id)
+        with snapshot.lock:
+            return self._sync(snapshot, full)
+
+    def _sync(self, snapshot, full):
+        started_at = datetime.now(timezone.utc)
+        due = (snapshot.full_sync_at is None or
+               time.monotonic() - snapshot.full_sync_at >=
+               self.full_sync_interval)
+        if full or due:
+            return self._full_sync(snapshot, started_at)
+
+        since = snapshot.synced_at - ACTIVITY_OVERLAP
+        # iter_activities yields nothing when none match (a 404)
+        activities = [activity for activity in self.client.iter_activities(
+            workspace_id=snapshot.workspace_id,
+            start_date=since.isoformat())
+            if activity.decision_import_id not in snapshot.seen_imports and
+            not _before(activity, snapshot.read_at)]
+        if not len(activities):
+            snapshot.synced_at = started_at
+            return _result(UNCHANGED)
+
+        assignments = list(snapshot.pending)
+        for activity in activities:
+            if not any(_matches(activity, assignment)
+                       for assignment in assignments):
+                return self._full_sync(snapshot, started_at, activities)
+        # assignments whose activity isn't listed yet are kept, and
+        # re-read again by the next sync
+        applied = [assignment for assignment in assignments
+                   if any(_matches(activity, assignment)
+                          for activity in activities)]
+
+        system_keys = list(dict.fromkeys(
+            int(applicant.system_key) for assignment in assignments
+            for applicant in assignment.applicants))
+        applications = self.client.get_applications_by_qtr_syskey_list(
+            snapshot.quarter_id, system_keys, snapshot.workspace_id)
+        refreshed = {}
+        for application in applications:
+            refreshed.setdefault(application.system_key, []).append(
+                application)
+        snapshot.applications.update(refreshed)
+        for system_key in applications.missing_keys:
+            snapshot.applications.pop(system_key, None)
+
+        for assignment in applied:
+            snapshot.pending.remove(assignment)
+        self._seen(snapshot, activities, started_at)
+        snapshot.synced_at = started_at
+        return _result(DELTA, len(activities), len(system_keys),
+                       len(applications.missing_keys))
+
+    def _full_sync(self, snapshot, started_at, activities=()):
+        pending = len(snapshot.pending)
+        applications = {}
+        for application in self.client.get_all_applications_by_qtr(
+                snapshot.quarter_id, snapshot.workspace_id):
+            applications.setdefault(application.system_key, []).append(
+                application)
+        snapshot.applications = applications
+        del snapshot.pending[:pending]
+        self._seen(snapshot, activities, started_at)
+        snapshot.synced_at = snapshot.read_at = started_at
+        snapshot.full_sync_at = time.monotonic()
+        return _result(FULL, len(activities), len(applications))
+
+    @staticmethod
+    def _seen(snapshot, activities, started_at):
+        # only imports that the next sync's overlap can return are kept
+        since = started_at - ACTIVITY_OVERLAP
+        for activity in activities:
+            snapshot.seen_imports[activity.decision_import_id] = (
+                activity.assignment_date)
+        snapshot.seen_imports = {
+            import_id: date for import_id, date in
+            snapshot.seen_imports.items()
+            if not _before(date, since)}
+
+
+def _before(activity_or_date, moment):
+    # activity dates without a time zone can't be compared, and are not
+    # taken as earlier
+    date = getattr(activity_or_date, 'assignment_date', activity_or_date)
+    return (moment is not None and date is not None and
+            date.tzinfo is not None and date < moment)
+
+
+def _matches(activity, assignment):
+    if activity.user != assignment.user:
+        return False
+    if isinstance(assignment, CohortAssignment):
+        return activity.cohort_number == int(assignment.cohort_number)
+    if isinstance(assignment, MajorAssignment):
+        return activity.major_program_code == assignment.major_code
+    return True
+
+
+def _result(mode, activities=0, refetched=0, removed=0):
+    return {"mode": mode, "activities": activities,
+            "refetched": refetched, "removed": removed}
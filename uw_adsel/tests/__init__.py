@@ -0,0 +1,22 @@
+from uw_adsel.models import CohortAssignment, Application
+
+
+def make_applicants(count):
+    return [Application(adsel_id=i, system_key=1000 + i,
+                        application_number=1)
+            for i in range(1, count + 1)]
+
+
+def cohort_assignment(applicants, **fields):
+    """
+    Returns a CohortAssignment of applicants, or of make_applicants(count)
+    given a count, to cohort 3 of workspace 1 unless fields say otherwise.
+    """
+    if isinstance(applicants, int):
+        applicants = make_applicants(applicants)
+    values = dict(assignment_type="upload", cohort_number=3,
+                  override_previous=False, override_protected=False,
+                  quarter=0, campus=1, comments="", user="javerage",
+                  workspace_id=1)
+    values.update(fields)
+    return CohortAssignment(applicants=applicants, **values)
@@ -1,9 +1,10 @@
 from unittest import TestCase, mock
 from restclients_core.exceptions import DataFailureException
+from uw_adsel.exceptions import PartialFailureException
 from uw_adsel import AdSel
 from uw_adsel.models import CohortAssignment, MajorAssignment, Application, \
     PurpleGoldApplication, PurpleGoldAssignment, DecisionAssignment, \
-    DepartmentalDecisionApplication
+    DepartmentalDecisionApplication, QuarterSnapshot
 from datetime import datetime
 
 
@@ -84,6 +85,50 @@ class AdselTest(TestCase):
                                                         system_key=12345)
         self.assertEqual(len(activities), 4)
 
+    def test_iter_activities(self):
+        activities = self.adsel.iter_activities()
+        first = next(activities)
+        self.assertEqual(first.decision_import_id, 784)
+        remaining = list(activities)
+        self.assertEqual(len(remaining), 4)
+        self.assertEqual(remaining[-1].decision_import_id, 780)
+
+        activities = list(self.adsel.iter_activities(netid="javerage"))
+        self.assertEqual(len(activities), 3)
+        self.assertEqual(activities[2].decision_import_id, 779)
+
+        self.assertEqual(list(self.adsel.iter_activities(netid="foo")), [])
+
+    def test_iter_cohorts(self):
+        self.assertEqual([cohort.cohort_number for cohort
+                          in self.adsel.iter_cohorts_by_qtr(0)], [1, 2, 3, 4])
+        self.assertEqual(len(list(self.adsel.iter_cohorts_by_qtr(0, 1))), 2)
+
+    def test_prefetch_pages(self):
+        client = AdSel(config={'prefetch_pages': True, 'page_workers': 2})
+        cohorts = client.get_cohorts_by_qtr(0)
+        self.assertEqual(len(cohorts), 4)
+        self.assertEqual([c.cohort_number for c in cohorts], [1, 2, 3, 4])
+        self.assertEqual(len(client.get_cohorts_by_qtr(0, workspace_id=1)),
+                         2)
+
+        activities = client.get_filtered_activities()
+        self.assertEqual(len(activities), 5)
+        self.assertEqual(activities[4].decision_import_id, 780)
+        activities = client.get_filtered_activities(netid="javerage")
+        self.assertEqual(len(activities), 3)
+        self.assertEqual(client.get_filtered_activities(netid="foo"), [])
+
+    def test_next_page(self):
+        self.assertEqual(self.adsel._next_page(
+            {"nextPage": "2", "totalCount": 2}, 1), 2)
+        self.assertIsNone(self.adsel._next_page(
+            {"nextPage": "2", "totalCount": 2}, 2))
+        self.assertIsNone(self.adsel._next_page({"cohorts": []}, 1))
+        self.assertEqual(self.adsel._page_url("/a", {"netid": "x"}, 2),
+                         "/a?netid=x&Page=2")
+        self.assertEqual(self.adsel._page_url("/a", {}), "/a")
+
     def test_get_application(self):
         applications = self.adsel.get_applications_by_qtr_syskey(0, 123, 1)
         self.assertEqual(len(applications), 4)
@@ -91,6 +136,33 @@ class AdselTest(TestCase):
         self.assertEqual(applications[0].sdb_app_status, 457)
         self.assertEqual(applications[1].sdb_app_status, 298)
 
+    def test_applications_from_json(self):
+        rows = [{'admissionsSelectionId': 1, 'applicationNbr': 2,
+                 'systemKey': 3, 'campus': 0, 'academicQtrKeyId': 20194,
+                 'assignedCohort': 4, 'assignedMajor': 'CSE',
+                 'majorProgramCode': '0_CSE_1', 'applicationType': 'Freshman',
+                 'sdbApplicationStatus': 16},
+                {'admissionsSelectionId': 5, 'applicationNbr': 6,
+                 'systemKey': 7, 'campus': 0, 'academicQtrKeyId': 20194,
+                 'assignedCohort': None, 'assignedMajor': None,
+                 'majorProgramCode': None, 'applicationType': None}]
+        applications = self.adsel._get_applications_from_json(rows)
+        self.assertEqual(len(applications), 2)
+        self.assertIsInstance(applications[0], Application)
+        self.assertEqual(applications[0].adsel_id, 1)
+        self.assertEqual(applications[0].major_program_code, '0_CSE_1')
+        self.assertEqual(applications[0].sdb_app_status, 16)
+        self.assertIsNone(applications[1].assigned_cohort)
+        self.assertIsNone(applications[1].sdb_app_status)
+        self.assertEqual(applications[1].json_data()['systemKey'], 7)
+
+        applications[1].assigned_cohort = 9
+        self.assertEqual(applications[1].assigned_cohort, 9)
+        self.assertEqual(applications[0].assigned_cohort, 4)
+
+        with self.assertRaises(KeyError):
+            self.adsel._get_applications_from_json([{'systemKey': 1}])
+
     def test_get_applications_by_syskey_list(self):
         # No Match
         applications = self.adsel.get_applications_by_qtr_syskey_list(0,
@@ -114,6 +186,48 @@ class AdselTest(TestCase):
         self.assertEqual(len(applications), 6)
         self.assertEqual(applications[0].application_type, "Postbac")
         self.assertIsNone(applications[5].application_type)
+        self.assertEqual([app.system_key for app in applications],
+                         [456340, 456340, 97508, 156340, 156340, 76711])
+
+    def test_lookup_string_keys(self):
+        applications = self.adsel.get_applications_by_qtr_syskey_list(
+            0, ["456340", "123"], 1)
+        self.assertEqual([app.system_key for app in applications],
+                         [456340, 456340])
+        self.assertEqual(applications.missing_keys, ["123"])
+        applications = self.adsel.get_applications_by_qtr_adselid_list(
+            0, ["54687"], 1)
+        self.assertEqual([app.adsel_id for app in applications], [54687])
+
+    def test_chunked_lookup(self):
+        client = AdSel(config={'bulk_chunk_size': 2, 'bulk_workers': 2})
+        applications = client.get_applications_by_qtr_syskey_list(
+            0, [456340, 97508, 156340, 76711], 1)
+        self.assertEqual(len(applications), 6)
+        self.assertEqual(applications[0].adsel_id, 54687)
+
+        applications = client._get_live_apps_by_qtr_adselid_list(
+            0, [1, 2, 3, 4, 5], 1)
+        self.assertEqual(len(applications), 8)
+
+        post_resource = client._post_resource
+
+        def fail_second_chunk(url, request):
+            if request == [3, 4]:
+                raise DataFailureException(url, 504, "timeout")
+            return post_resource(url, request)
+
+        with mock.patch.object(client, '_post_resource',
+                               side_effect=fail_second_chunk):
+            with self.assertRaises(PartialFailureException) as cm:
+                client._get_live_apps_by_qtr_syskey_list(0,
+                                                         [1, 2, 3, 4, 5],
+                                                         1)
+        self.assertEqual(len(cm.exception.results), 8)
+        self.assertEqual(len(cm.exception.failures), 1)
+        self.assertEqual(cm.exception.failures[0]['chunk'], 1)
+        self.assertEqual(cm.exception.failures[0]['keys'], [3, 4])
+        self.assertEqual(cm.exception.status, 504)
 
     def test_get_applications_by_adselid_list(self):
         # No Match
@@ -128,7 +242,8 @@ class AdselTest(TestCase):
                                                                         84136],
                                                                        1)
         self.assertEqual(len(applications), 2)
-        # Full Match
+        self.assertEqual(applications.missing_keys, [123])
+        # Full Match, in the requested order
         applications = self.adsel.get_applications_by_qtr_adselid_list(0,
                                                                        [73445,
                                                                         45743,
@@ -137,8 +252,9 @@ class AdselTest(TestCase):
                                                                        1)
         self.assertEqual(len(applications), 4)
         self.assertEqual(applications[0].application_type, "Transfer")
-        self.assertEqual(applications[0].sdb_app_status, 111)
-        self.assertEqual(applications[1].sdb_app_status, 33)
+        self.assertEqual(applications[0].sdb_app_status, 33)
+        self.assertEqual(applications[1].sdb_app_status, 111)
+        self.assertEqual(applications.missing_keys, [])
 
     def test_post(self):
         a1 = Application()
@@ -376,6 +492,49 @@ class AdselTest(TestCase):
         self.assertEqual(ws_data['workspaceStatusId'], 1)
         self.assertEqual(ws_data['workspaceStatusDesc'], "Main")
 
+    def test_quarter_snapshot(self):
+        snapshot = AdSel().get_quarter_snapshot(0, 1, 2024, 4, 0)
+        self.assertEqual(len(snapshot.cohorts), 2)
+        self.assertEqual(len(snapshot.decisions), 8)
+        self.assertEqual(len(snapshot.static_filters['residentGroup']), 3)
+        self.assertEqual(len(snapshot.dynamic_filters['sdbCohort']), 43)
+        self.assertEqual(set(snapshot.timings),
+                         set(QuarterSnapshot.COMPONENTS))
+
+        # no majors or workspaces mock for quarter 0
+        self.assertFalse(snapshot.is_complete())
+        self.assertIsNone(snapshot.majors)
+        self.assertIsNone(snapshot.workspaces)
+        self.assertEqual(set(snapshot.errors), {'majors', 'workspaces'})
+        self.assertIsInstance(snapshot.errors['majors'],
+                              DataFailureException)
+
+    def test_quarter_snapshot_filter_quarter(self):
+        client = AdSel()
+        with mock.patch.object(client, '_get_filter_values',
+                               return_value={}) as filter_values:
+            client.get_quarter_snapshot(1, 1)
+        self.assertEqual(sorted(call[0] for call in
+                                filter_values.call_args_list),
+                         [("dynamic", "2019", "1", 0),
+                          ("static", "2019", "1", 0)])
+
+        snapshot = client.get_quarter_snapshot(99, 1)
+        self.assertIsInstance(snapshot.errors['static_filters'], ValueError)
+        self.assertIsInstance(snapshot.errors['dynamic_filters'], ValueError)
+
+        # a failed lookup fails only the filters
+        with mock.patch.object(client, 'get_quarters',
+                               side_effect=DataFailureException(
+                                   "/api/v1/academicqtr", 503, "")):
+            snapshot = client.get_quarter_snapshot(0, 1)
+        self.assertEqual(set(snapshot.errors),
+                         {'majors', 'workspaces', 'static_filters',
+                          'dynamic_filters'})
+        self.assertEqual(snapshot.errors['static_filters'].status, 503)
+        self.assertEqual(len(snapshot.cohorts), 2)
+        self.assertEqual(len(snapshot.decisions), 8)
+
     def test_duplicate_workspace(self):
         client = AdSel()
         workspace = client.duplicate_workspace(16,
@@ -0,0 +1,145 @@
+from unittest import TestCase, mock
+from restclients_core.exceptions import DataFailureException
+from uw_adsel import AdSel, AdSelAzureAssign
+from uw_adsel.models import MajorAssignment, Application
+from uw_adsel.tests import make_applicants, cohort_assignment
+
+
+class AdselAzureAssignTest(TestCase):
+    def test_chunked_cohorts(self):
+        client = AdSelAzureAssign(config={'assignment_chunk_size': 2})
+        assignment = cohort_assignment(make_applicants(5))
+        submit = client.assign_cohorts_bulk(assignment)
+        self.assertEqual(len(submit['request']), 3)
+        self.assertEqual(
+            [[a['admissionSelectionId'] for a in request['applicants']]
+             for request in submit['request']],
+            [[1, 2], [3, 4], [5]])
+        self.assertEqual(submit['request'][2]['cohortNbr'], 3)
+        self.assertEqual(
+            submit['request'][2]['assignmentDetail']['workspaceId'], 1)
+        self.assertEqual(submit['response'],
+                         [{'string_response': ''}] * 3)
+        self.assertEqual(submit['failures'], [])
+        self.assertEqual(len(assignment.applicants), 5)
+
+    def test_chunked_majors(self):
+        client = AdSel(config={'assignment_chunk_size': 3,
+                               'assignment_workers': 1})
+        assignment = MajorAssignment(applicants=make_applicants(4),
+                                     assignment_type="upload",
+                                     major_code="CSE",
+                                     quarter=0,
+                                     campus=1,
+                                     workspace_id=1)
+        submit = client.assign_majors(assignment)
+        self.assertEqual(len(submit['request']), 2)
+        self.assertEqual(len(submit['request'][1]['Applicants']), 1)
+        self.assertEqual(submit['request'][1]['MajorProgramCode'], "CSE")
+
+    def test_chunk_failures(self):
+        client = AdSelAzureAssign(config={'assignment_chunk_size': 2})
+        post_body = client._post_body
+
+        def fail_second_chunk(url, body):
+            if '"admissionSelectionId": 3' in body:
+                raise DataFailureException(url, 413, "too large")
+            return post_body(url, body)
+
+        with mock.patch.object(client, '_post_body',
+                               side_effect=fail_second_chunk):
+            submit = client.assign_cohorts_bulk(
+                cohort_assignment(make_applicants(5)))
+        self.assertEqual(submit['response'][1], None)
+        self.assertEqual(len(submit['failures']), 1)
+        self.assertEqual(submit['failures'][0]['chunk'], 1)
+        self.assertEqual(submit['failures'][0]['error'].status, 413)
+        self.assertEqual([a.adsel_id for a in submit['failed_applicants']],
+                         [3, 4])
+
+    def test_without_request_echo(self):
+        client = AdSelAzureAssign(config={'echo_requests': False})
+        assignment = cohort_assignment(make_applicants(3))
+        with mock.patch.object(client, '_post_body',
+                               wraps=client._post_body) as post_body:
+            submit = client.assign_cohorts_bulk(assignment)
+        self.assertIsNone(submit['request'])
+        self.assertEqual(submit['response'], {'string_response': ''})
+        self.assertEqual(post_body.call_args.args[1],
+                         assignment.json_bytes())
+
+
+class PreflightTest(TestCase):
+    def applicants(self, *adsel_ids):
+        return [Application(adsel_id=adsel_id, system_key=1,
+                            application_number=1)
+                for adsel_id in adsel_ids]
+
+    def test_cohort_preflight(self):
+        client = AdSelAzureAssign(config={'preflight': True})
+        assignment = cohort_assignment(
+            self.applicants(54687, 84136, 73445, 99999), cohort_number=2,
+            override_previous=True)
+        submit = client.assign_cohorts_bulk(assignment)
+        diff = submit['preflight']
+        self.assertEqual([a.adsel_id for a in diff.changes], [73445])
+        self.assertEqual([a.adsel_id for a in diff.unchanged], [84136])
+        self.assertEqual([a.adsel_id for a in diff.protected], [54687])
+        self.assertEqual([a.adsel_id for a in diff.unknown], [99999])
+        self.assertEqual(diff.summary(), {"changes": 1, "unchanged": 1,
+                                          "protected": 1, "unknown": 1})
+        self.assertEqual(
+            [a['admissionSelectionId']
+             for a in submit['request']['applicants']], [73445])
+        self.assertEqual(len(assignment.applicants), 4)
+
+        assignment.override_protected = True
+        submit = client.assign_cohorts_bulk(assignment)
+        self.assertEqual([a.adsel_id for a in submit['preflight'].changes],
+                         [54687, 73445])
+
+    def test_protected_cohort_on_later_page(self):
+        client = AdSelAzureAssign(config={'preflight': True})
+        adsel = client._client(AdSel)
+        cohort = adsel._get_resource("/api/v1/cohorts/0")["cohorts"][0]
+        pages = {
+            "/api/v1/cohorts/0?workspaceId=1": {
+                "nextPage": "2", "totalCount": 2,
+                "cohorts": [dict(cohort, protectedGroupInd=False)]},
+            "/api/v1/cohorts/0?workspaceId=1&Page=2": {
+                "nextPage": "2", "totalCount": 2,
+                "cohorts": [dict(cohort, cohortNbr=2)]},
+        }
+        get_resource = adsel._get_resource
+        assignment = cohort_assignment(self.applicants(84136),
+                                       cohort_number=1,
+                                       override_previous=True)
+        with mock.patch.object(adsel, '_get_resource',
+                               side_effect=lambda url: pages.get(
+                                   url) or get_resource(url)):
+            submit = client.assign_cohorts_bulk(assignment)
+        self.assertEqual(
+            [a.adsel_id for a in submit['preflight'].protected], [84136])
+
+    def test_major_preflight(self):
+        client = AdSelAzureAssign(config={'preflight': True,
+                                          'assignment_chunk_size': 1})
+        assignment = MajorAssignment(
+            applicants=self.applicants(84136, 45743, 73445),
+            assignment_type="upload", major_code="0_CSE_123", quarter=0,
+            campus=1, workspace_id=1)
+        submit = client.assign_majors(assignment)
+        self.assertEqual([a.adsel_id for a in submit['preflight'].changes],
+                         [45743])
+        self.assertEqual(len(submit['request']), 1)
+
+    def test_nothing_to_submit(self):
+        client = AdSelAzureAssign(config={'preflight': True})
+        assignment = MajorAssignment(
+            applicants=self.applicants(84136), assignment_type="upload",
+            major_code="0_CSE_123", quarter=0, campus=1, workspace_id=1)
+        with mock.patch.object(client, '_post_body') as post_body:
+            submit = client.assign_majors(assignment)
+        post_body.assert_not_called()
+        self.assertIsNone(submit['response'])
+        self.assertEqual(submit['preflight'].summary()['unchanged'], 1)
@@ -45,6 +45,23 @@ class AdselTest(TestCase):
         self.assertEqual(len(detail_lines), 9)
         self.assertIn("Bill Student", detail_lines[1])
 
+    def test_conflict_details_streamed(self):
+        chunks = list(self.adsel.iter_conflict_details_cohort(1, 2))
+        self.assertEqual("".join(chunks),
+                         self.adsel.get_conflict_details_cohort(1, 2))
+        chunks = list(self.adsel.iter_conflict_details_major(1, 2))
+        self.assertEqual("".join(chunks),
+                         self.adsel.get_conflict_details_major(1, 2))
+
+        rows = [{"name": " Bill Student ", "id": 1},
+                {"name": "Jane Student\t", "id": 2}]
+        chunks = list(AdSelAzureMerge._iter_conflict_csv(rows, chunk_size=1))
+        self.assertEqual(chunks, ["name,id\r\nBill Student,1\r\n",
+                                  "Jane Student,2\r\n"])
+        self.assertEqual("".join(chunks),
+                         AdSelAzureMerge._get_conflict_csv(rows))
+        self.assertEqual(AdSelAzureMerge._get_conflict_csv(None), "")
+
     def test_major_conflict(self):
         conflicts = self.adsel.check_conflict_major(1, 2)
         self.assertEqual(len(conflicts), 10)
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase, mock
+from uw_adsel.aio import AsyncAdSel, AsyncAdSelAzureAssign, \
+    AsyncAdSelAzureMerge
+from uw_adsel.models import CohortAssignment
+
+
+class AsyncAdselTest(IsolatedAsyncioTestCase):
+    async def test_gather(self):
+        client = AsyncAdSel()
+        majors, cohorts, decisions, workspaces, filters = \
+            await asyncio.gather(
+                client.get_majors_by_qtr(1, 1),
+                client.get_cohorts_by_qtr(0, workspace_id=1),
+                client.get_decisions(0, 1),
+                client.get_workspaces_by_qtr(20194),
+                client.get_dynamic_filter_values(2024, 4, 0))
+        self.assertEqual(majors[0].assigned_count, 120)
+        self.assertEqual(len(cohorts), 2)
+        self.assertEqual(len(decisions), 8)
+        self.assertEqual(len(workspaces), 9)
+        self.assertEqual(len(filters['sdbCohort']), 43)
+
+    async def test_iter_activities(self):
+        client = AsyncAdSel()
+        activities = [activity async for activity in
+                      client.iter_activities(netid="javerage")]
+        self.assertEqual(len(activities), 3)
+        self.assertEqual(activities[2].decision_import_id, 779)
+        self.assertEqual([activity async for activity in
+                          client.iter_activities(netid="foo")], [])
+
+    async def test_generator_methods(self):
+        client = AsyncAdSel()
+        threads = []
+
+        def get_resource(url):
+            threads.append(threading.current_thread())
+            return get_resource.original(url)
+        get_resource.original = client.client._get_resource
+        with mock.patch.object(client.client, '_get_resource',
+                               side_effect=get_resource):
+            cohorts = [cohort async for cohort in
+                       client.iter_cohorts_by_qtr(0)]
+        self.assertEqual(len(cohorts), 4)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    async def test_assign(self):
+        client = AsyncAdSelAzureAssign()
+        cohort = CohortAssignment(cohort_number=1, campus=2)
+        submit = await client.assign_cohorts_bulk(cohort)
+        self.assertEqual(submit['response'], {'string_response': ''})
+
+    async def test_merge(self):
+        client = AsyncAdSelAzureMerge()
+        cohort, major = await asyncio.gather(
+            client.check_conflict_cohort(1, 2),
+            client.check_conflict_major(1, 2))
+        self.assertEqual(cohort[0].source_cohort, 1)
+        self.assertEqual(major[0].source_major, '0_C SCI_00_1_5')
@@ -0,0 +1,159 @@
+from unittest import TestCase, mock
+from uw_adsel import AdSel, AdSelAzureMerge
+from uw_adsel.cache import TTLCache, NoCache
+from uw_adsel.models import AdminCohort, AdminMajor, CohortAssignment, \
+    MajorMerge, DecisionAssignment
+
+
+class TTLCacheTest(TestCase):
+    def test_expiry(self):
+        cache = TTLCache()
+        with mock.patch('uw_adsel.cache.time.monotonic', return_value=100):
+            cache.set("/a", [1], 10)
+            cache.set("/b", [2], 0)
+            self.assertEqual(cache.get("/a"), [1])
+            self.assertIsNone(cache.get("/b"))
+        with mock.patch('uw_adsel.cache.time.monotonic', return_value=110):
+            self.assertIsNone(cache.get("/a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_entries=2)
+        cache.set("/a", 1, 60)
+        cache.set("/b", 2, 60)
+        cache.get("/a")
+        cache.set("/c", 3, 60)
+        self.assertEqual(cache.get("/a"), 1)
+        self.assertIsNone(cache.get("/b"))
+        self.assertEqual(cache.get("/c"), 3)
+
+    def test_invalidate(self):
+        cache = TTLCache()
+        cache.set("/a/1", 1, 60)
+        cache.set("/b/1", 2, 60)
+        cache.invalidate(lambda key: key.startswith("/a"))
+        self.assertIsNone(cache.get("/a/1"))
+        self.assertEqual(cache.get("/b/1"), 2)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_no_cache(self):
+        cache = NoCache()
+        cache.set("/a", 1, 60)
+        self.assertIsNone(cache.get("/a"))
+
+
+class AdSelCacheTest(TestCase):
+    def test_cached_reference_data(self):
+        client = AdSel(config={'cache': TTLCache()})
+        with mock.patch.object(client.DAO, 'getURL',
+                               wraps=client.DAO.getURL) as get_url:
+            client.get_admin_majors()
+            client.get_admin_majors()
+            client.get_workspaces_by_qtr(20194)
+            client.get_workspaces_by_qtr(20194)
+            client.get_all_applications_by_qtr(0, 1)
+            client.get_all_applications_by_qtr(0, 1)
+            self.assertEqual(get_url.call_count, 4)
+
+    def test_cache_ttl_override(self):
+        client = AdSel(config={'cache': TTLCache(),
+                               'cache_ttls': {'admin_majors': 0}})
+        client.get_admin_majors()
+        client.get_admin_majorvalues()
+        self.assertEqual(len(client.cache), 1)
+
+    def test_raw_json_copied(self):
+        client = AdSel(config={'cache': TTLCache()})
+        filters = client.get_static_filter_values(2024, 4, 0)
+        expected = len(filters)
+        filters.clear()
+        self.assertEqual(len(client.get_static_filter_values(2024, 4, 0)),
+                         expected)
+        client.get_admin_majorvalues().clear()
+        self.assertNotEqual(client.get_admin_majorvalues(), {})
+
+    def test_write_invalidation(self):
+        client = AdSel(config={'cache': TTLCache()})
+        client.get_admin_majors()
+        client.get_workspaces_by_qtr(20194)
+        client.get_decisions(1)
+        self.assertEqual(len(client.cache), 3)
+
+        client.reset_workspace(16, "javerage")
+        self.assertEqual(len(client.cache), 1)
+
+        with mock.patch.object(client, '_post_resource', return_value={}):
+            client.post_admin_major(AdminMajor())
+        self.assertEqual(len(client.cache), 0)
+
+    def test_admin_cohorts_not_cached(self):
+        client = AdSel(config={'cache': TTLCache()})
+        client.get_admin_cohorts_by_qtr(20194)
+        self.assertEqual(len(client.cache), 0)
+        self.assertIsNone(AdSel._count_read_key("/api/v1/admin/cohorts/0"))
+
+    def test_admin_cohort_invalidation(self):
+        client = AdSel(config={'cache': TTLCache()})
+        client.get_cohorts_by_qtr(0)
+        client.get_static_filter_values(2024, 4, 0)
+        self.assertEqual(len(client.cache), 2)
+        with mock.patch.object(client, '_put_resource', return_value={}):
+            client.put_admin_cohort(AdminCohort())
+        self.assertEqual(len(client.cache), 0)
+
+        client.get_cohorts_by_qtr(0)
+        with mock.patch.object(client, '_post_resource', return_value={}):
+            client.copy_cohort(1, 2)
+        self.assertEqual(len(client.cache), 0)
+
+    def test_count_read_key(self):
+        self.assertEqual(
+            AdSel._count_read_key("/api/v1/majors/details/1?workspaceId=2"),
+            ('majors', '1', '2'))
+        self.assertEqual(
+            AdSel._count_read_key("/api/v1/majors/details/0/0_CSE_1"),
+            ('majors', '0', None))
+        self.assertEqual(
+            AdSel._count_read_key("/api/v1/cohorts/0?workspaceId=1&Page=2"),
+            ('cohorts', '0', '1'))
+        self.assertEqual(
+            AdSel._count_read_key("/api/v1/departmentaldecisions/"
+                                  "GetWithCounts?academicQtrKeyId=0"
+                                  "&workspaceId=1"),
+            ('decisions', '0', '1'))
+        self.assertIsNone(AdSel._count_read_key("/api/v1/academicqtr"))
+
+    def test_scoped_count_invalidation(self):
+        client = AdSel(config={'cache': TTLCache()})
+        client.get_cohorts_by_qtr(0)
+        client.get_cohorts_by_qtr(0, workspace_id=1)
+        client.get_cohorts_by_qtr(1)
+        client.get_majors_by_qtr(1, 1)
+        client.get_decisions(0, 1)
+        client.get_decisions(1)
+        self.assertEqual(len(client.cache), 6)
+
+        # quarter 0, workspace 1 cohorts and the unscoped quarter 0 read
+        assignment = CohortAssignment(cohort_number=1, campus=2, quarter=0,
+                                      workspace_id=1)
+        client.assign_cohorts_bulk(assignment)
+        self.assertEqual(len(client.cache), 4)
+        self.assertIsNotNone(client.cache.get("/api/v1/cohorts/1"))
+
+        assignment = DecisionAssignment(campus=1, quarter=0, workspace_id=1)
+        client.assign_decisions(assignment)
+        self.assertEqual(len(client.cache), 3)
+
+    def test_merge_invalidation(self):
+        cache = TTLCache()
+        client = AdSel(config={'cache': cache})
+        client.get_cohorts_by_qtr(0, workspace_id=1)
+        client.get_majors_by_qtr(1, 1)
+        merge = AdSelAzureMerge(config={'cache': cache})
+        merge.merge_major(MajorMerge(from_ws_id=2, to_ws_id=1,
+                                     major_code='0_BIOL_1'))
+        self.assertEqual(len(cache), 1)
+        merge.merge_major(MajorMerge(from_ws_id=1, to_ws_id=2,
+                                     major_code='0_BIOL_1'))
+        self.assertEqual(len(cache), 1)
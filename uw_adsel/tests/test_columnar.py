@@ -0,0 +1,46 @@
+from unittest import TestCase
+from uw_adsel import AdSel
+from uw_adsel.columnar import ApplicationTable
+from uw_adsel.models import Application
+
+
+class ApplicationTableTest(TestCase):
+    def test_compact_applications(self):
+        table = AdSel().get_all_applications_by_qtr(0, 1, compact=True)
+        self.assertIsInstance(table, ApplicationTable)
+        self.assertEqual(len(table), 4)
+
+        applications = AdSel().get_all_applications_by_qtr(0, 1)
+        for row, application in zip(table, applications):
+            for name in row._fields:
+                self.assertEqual(getattr(row, name),
+                                 getattr(application, name))
+
+        self.assertIsNone(table[3].assigned_cohort)
+        self.assertEqual(table[-1].adsel_id, 345)
+        with self.assertRaises(IndexError):
+            table[4]
+
+    def test_lookup(self):
+        table = AdSel().get_all_applications_by_qtr(0, 1, compact=True)
+        self.assertEqual(table.get(453).system_key, 156340)
+        self.assertIsNone(table.get(999))
+        rows = table.find('assigned_cohort', 2)
+        self.assertEqual([row.adsel_id for row in rows], [34, 453])
+
+    def test_columns(self):
+        table = AdSel().get_all_applications_by_qtr(0, 1, compact=True)
+        self.assertEqual(table.column('adsel_id'), [1, 34, 453, 345])
+        self.assertEqual(table.column('assigned_cohort'), [1, 2, 2, None])
+        self.assertEqual(table.column('assigned_major'), ['string'] * 4)
+
+    def test_to_applications(self):
+        a1 = Application(adsel_id=1, system_key=10, assigned_major='CSE')
+        a2 = Application(adsel_id=2, system_key=20, assigned_cohort=4)
+        table = ApplicationTable.from_applications([a1, a2])
+        applications = table.to_applications()
+        self.assertIsInstance(applications[0], Application)
+        self.assertEqual(applications[0].assigned_major, 'CSE')
+        self.assertIsNone(applications[0].assigned_cohort)
+        self.assertEqual(applications[1].assigned_cohort, 4)
+        self.assertEqual(applications[1].json_data()['systemKey'], 20)
@@ -0,0 +1,77 @@
+from unittest import TestCase
+from uw_adsel import AdSelAzureMerge
+from uw_adsel.columnar import ApplicationTable
+from uw_adsel.conflicts import ConflictEngine, conflict_mismatches
+from uw_adsel.models import Application
+
+
+def application(adsel_id, cohort=None, major=None):
+    return Application(adsel_id=adsel_id, assigned_cohort=cohort,
+                       major_program_code=major)
+
+
+class ConflictEngineTest(TestCase):
+    def setUp(self):
+        source = [application(1, 1, "0_BIOL_1"), application(2, 1),
+                  application(3, 2, "0_CSE_1"), application(4)]
+        destination = [application(1, 1, "0_CSE_1"), application(2, 3),
+                       application(3, 2), application(5, 2, "0_CSE_1")]
+        self.engine = ConflictEngine(source, destination, 1, 2,
+                                     "WS One", "WS Two")
+
+    def summary(self, conflicts, key):
+        return [(getattr(conflict, key), conflict.source_assigned_count,
+                 conflict.destination_assigned_count,
+                 conflict.conflict_status) for conflict in conflicts]
+
+    def test_conflicts(self):
+        cohorts = self.engine.cohort_conflicts()
+        self.assertEqual(self.summary(cohorts, 'source_cohort'),
+                         [(1, 2, 1, True), (2, 1, 2, False)])
+        self.assertEqual(cohorts[0].source_ws, 1)
+        self.assertEqual(cohorts[0].source_ws_name, "WS One")
+        self.assertEqual(cohorts[0].destination_ws, 2)
+        self.assertEqual(cohorts[0].destination_ws_name, "WS Two")
+        self.assertEqual(
+            self.summary(self.engine.major_conflicts(), 'source_major'),
+            [("0_BIOL_1", 1, 0, True), ("0_CSE_1", 1, 2, False)])
+
+    def test_incremental_updates(self):
+        self.engine.update_destination([application(2, 1)])
+        self.engine.update_source([application(1, 2, "0_CSE_1"),
+                                   application(6, 4)])
+        self.engine.remove_destination([1, 5])
+        self.engine.remove_source([99])
+
+        rebuilt = ConflictEngine(
+            [application(1, 2, "0_CSE_1"), application(2, 1),
+             application(3, 2, "0_CSE_1"), application(4),
+             application(6, 4)],
+            [application(2, 1), application(3, 2)], 1, 2)
+        for method, key in (('cohort_conflicts', 'source_cohort'),
+                            ('major_conflicts', 'source_major')):
+            self.assertEqual(
+                self.summary(getattr(self.engine, method)(), key),
+                self.summary(getattr(rebuilt, method)(), key))
+        self.assertEqual(
+            self.summary(self.engine.cohort_conflicts(), 'source_cohort'),
+            [(1, 1, 1, False), (2, 2, 1, False), (4, 1, 0, False)])
+
+    def test_mismatches(self):
+        local = self.engine.cohort_conflicts()
+        self.assertEqual(conflict_mismatches(local, local), [])
+        server = self.engine.cohort_conflicts()
+        server[1].conflict_status = True
+        self.assertEqual(conflict_mismatches(local, server[1:]), [1, 2])
+
+    def test_local_conflicts(self):
+        engine = AdSelAzureMerge().local_conflicts(0, 1, 1)
+        self.assertEqual(
+            self.summary(engine.cohort_conflicts(), 'source_cohort'),
+            [(1, 1, 1, False), (2, 2, 2, False)])
+
+        table = ApplicationTable.from_applications([application(34, 1)])
+        engine.update_destination(table)
+        self.assertEqual(
+            self.summary(engine.cohort_conflicts(), 'source_cohort'),
+            [(1, 1, 2, False), (2, 2, 1, True)])
@@ -0,0 +1,63 @@
+from unittest import TestCase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+import socket
+from commonconf import override_settings
+from restclients_core.dao import LiveDAO
+from uw_adsel import AdSel, AdSelAzureAssign, AdSelAzureMerge
+from uw_adsel.dao import pool_stats
+
+
+class QuartersHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"[]")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledLiveDAOTest(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), QuartersHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        LiveDAO.pools.pop('adsel', None)
+
+    def tearDown(self):
+        LiveDAO.pools.pop('adsel', None)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_pool_stats(self):
+        host = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        with override_settings(RESTCLIENTS_ADSEL_DAO_CLASS='Live',
+                               RESTCLIENTS_ADSEL_HOST=host,
+                               RESTCLIENTS_ADSEL_POOL_SIZE=2,
+                               RESTCLIENTS_ADSEL_POOL_TIMEOUT=1):
+            client = AdSel()
+            for _ in range(3):
+                self.assertEqual(client.get_quarters(), [])
+
+        stats = pool_stats()['adsel']
+        self.assertEqual(stats['maxsize'], 2)
+        self.assertEqual(stats['checkouts'], 3)
+        self.assertEqual(stats['new_connections'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['waits'], 0)
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+                      LiveDAO.pools['adsel'].conn_kw['socket_options'])
+
+
+class ClientReuseTest(TestCase):
+    def test_client_reuse(self):
+        client = AdSel()
+        assign = client._client(AdSelAzureAssign)
+        self.assertIs(client._client(AdSelAzureAssign), assign)
+        self.assertIs(assign.config, client.config)
+        self.assertIs(assign._client(AdSelAzureAssign), assign)
+        self.assertIsNot(client._client(AdSelAzureMerge), assign)
+        self.assertIsNot(assign._client(AdSel), client)
@@ -0,0 +1,38 @@
+from unittest import TestCase
+from uw_adsel.index import ApplicationIndex
+from uw_adsel.models import Application
+
+
+class ApplicationIndexTest(TestCase):
+    def setUp(self):
+        self.applications = [
+            Application(adsel_id=1, system_key=10),
+            Application(adsel_id=2, system_key=20),
+            Application(adsel_id=3, system_key=10),
+        ]
+
+    def test_index(self):
+        index = ApplicationIndex(self.applications, 'system_key')
+        self.assertEqual(len(index), 2)
+        self.assertIn(10, index)
+        self.assertNotIn(30, index)
+        self.assertEqual([app.adsel_id for app in index.get(10)], [1, 3])
+        self.assertEqual(index.get(30), [])
+
+    def test_select(self):
+        index = ApplicationIndex(self.applications, 'system_key')
+        selected = index.select([20, 30, 10, 20])
+        self.assertEqual([app.adsel_id for app in selected], [2, 1, 3])
+        self.assertEqual(selected.missing_keys, [30])
+
+        index = ApplicationIndex(self.applications, 'adsel_id')
+        selected = index.select([3, 1])
+        self.assertEqual([app.adsel_id for app in selected], [3, 1])
+        self.assertEqual(selected.missing_keys, [])
+
+    def test_string_keys(self):
+        index = ApplicationIndex(self.applications, 'system_key')
+        self.assertIn("10", index)
+        selected = index.select(["20", 20, "x", 30])
+        self.assertEqual([app.adsel_id for app in selected], [2])
+        self.assertEqual(selected.missing_keys, ["x", 30])
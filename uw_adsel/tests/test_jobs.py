@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
+from restclients_core.exceptions import DataFailureException
+from uw_adsel import AdSel
+from uw_adsel.jobs import AssignmentJob
+from uw_adsel.models import DecisionAssignment, \
+    DepartmentalDecisionApplication
+from uw_adsel.tests import cohort_assignment
+
+
+class AssignmentJobTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.tmpdir.name, "job.journal")
+        self.client = AdSel()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def submitted(self, submit):
+        return [[a.adsel_id for a in call.args[0].applicants]
+                for call in submit.call_args_list]
+
+    def test_resume(self):
+        assignment = cohort_assignment(5)
+
+        def crash(index, chunk):
+            if index == 1:
+                raise RuntimeError("worker killed")
+
+        job = AssignmentJob(self.client, 'assign_cohorts_bulk', assignment,
+                            self.journal, chunk_size=2, before_chunk=crash)
+        with mock.patch.object(self.client, 'assign_cohorts_bulk',
+                               wraps=self.client.assign_cohorts_bulk) as sub:
+            with self.assertRaises(RuntimeError):
+                job.run()
+            self.assertEqual(self.submitted(sub), [[1, 2]])
+        self.assertEqual(job.acknowledged(), {1, 2})
+
+        job = AssignmentJob(self.client, 'assign_cohorts_bulk', assignment,
+                            self.journal, chunk_size=2)
+        with mock.patch.object(self.client, 'assign_cohorts_bulk',
+                               wraps=self.client.assign_cohorts_bulk) as sub:
+            result = job.run()
+            self.assertEqual(self.submitted(sub), [[3, 4], [5]])
+        self.assertEqual(result['skipped'], 2)
+        self.assertEqual(len(result['request']), 2)
+        self.assertEqual(job.acknowledged(), {1, 2, 3, 4, 5})
+
+        # a finished job submits nothing
+        with mock.patch.object(self.client, 'assign_cohorts_bulk') as sub:
+            self.assertEqual(job.run()['skipped'], 5)
+            self.assertEqual(sub.call_count, 0)
+
+    def test_torn_journal_line(self):
+        job = AssignmentJob(self.client, 'assign_cohorts_bulk',
+                            cohort_assignment(3), self.journal, chunk_size=1)
+        job.run()
+        with open(self.journal, "a") as journal:
+            journal.write('{"chunk": 9, "adsel_ids": [7')
+        self.assertEqual(job.acknowledged(), {1, 2, 3})
+
+    def test_different_assignment(self):
+        AssignmentJob(self.client, 'assign_cohorts_bulk',
+                      cohort_assignment(1), self.journal).run()
+        job = AssignmentJob(self.client, 'assign_cohorts_bulk',
+                            cohort_assignment(1, cohort_number=4),
+                            self.journal)
+        with self.assertRaises(ValueError):
+            job.run()
+
+    def test_decisions(self):
+        applicants = [DepartmentalDecisionApplication(adsel_id=i,
+                                                      decision_id=2)
+                      for i in range(1, 4)]
+        assignment = DecisionAssignment(applicants=applicants,
+                                        assignment_type="upload",
+                                        quarter=0,
+                                        campus=1,
+                                        user="javerage",
+                                        decision_number=1,
+                                        workspace_id=1)
+        calls = []
+
+        def fail_once(url, body):
+            calls.append(json.loads(body))
+            if len(calls) == 2:
+                raise DataFailureException(url, 503, "unavailable")
+            return {}
+
+        job = AssignmentJob(self.client, 'assign_decisions', assignment,
+                            self.journal, chunk_size=1)
+        with mock.patch.object(self.client, '_post_body',
+                               side_effect=fail_once):
+            with self.assertRaises(DataFailureException):
+                job.run()
+            self.assertEqual(job.acknowledged(), {1})
+            result = job.run()
+        self.assertEqual(result['skipped'], 1)
+        self.assertEqual(job.acknowledged(), {1, 2, 3})
+        self.assertEqual(
+            [request['applicants'][0]['admissionSelectionId']
+             for request in calls], [1, 2, 2, 3])
+        with open(self.journal) as journal:
+            header = json.loads(journal.readline())
+        self.assertEqual(header['method'], 'assign_decisions')
@@ -0,0 +1,50 @@
+import json
+from unittest import TestCase
+from uw_adsel import AdSel
+from uw_adsel.jsonstream import iter_chunks, iter_json_array
+
+
+class JSONStreamTest(TestCase):
+    def parse(self, data, chunk_size):
+        return list(iter_json_array(iter_chunks(data, chunk_size)))
+
+    def test_chunk_boundaries(self):
+        rows = [{"id": 1, "name": "José", "tags": ["a", "]", ","]},
+                {"id": 22, "nested": {"list": [1, 2, {"x": None}]}},
+                12345, "text, with ] brackets", True, None, 6.5e3]
+        data = json.dumps(rows).encode('utf-8')
+        for chunk_size in (1, 2, 3, 7, len(data)):
+            self.assertEqual(self.parse(data, chunk_size), rows)
+        self.assertEqual(self.parse(json.dumps(rows, indent=2), 5), rows)
+
+    def test_empty(self):
+        self.assertEqual(self.parse(b"[]", 1), [])
+        self.assertEqual(self.parse(b" [ \n ] ", 2), [])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.parse(b'{"a": 1}', 4)
+        with self.assertRaises(ValueError):
+            self.parse(b'[{"a": 1}', 4)
+        with self.assertRaises(ValueError):
+            self.parse(b'[{"a": 1} {"b": 2}]', 4)
+        with self.assertRaises(ValueError):
+            self.parse(b'[{"a": }]', 4)
+        with self.assertRaises(ValueError):
+            self.parse(b'[1] [2]', 4)
+
+    def test_lazy(self):
+        def chunks():
+            yield b'[{"a": 1}, '
+            raise AssertionError("read past the first element")
+        elements = iter_json_array(chunks())
+        self.assertEqual(next(elements), {"a": 1})
+
+    def test_iter_all_applications(self):
+        client = AdSel()
+        streamed = list(client.iter_all_applications_by_qtr(0, 1))
+        applications = client.get_all_applications_by_qtr(0, 1)
+        self.assertEqual([app.adsel_id for app in streamed],
+                         [app.adsel_id for app in applications])
+        self.assertEqual(streamed[1].sdb_app_status,
+                         applications[1].sdb_app_status)
@@ -0,0 +1,67 @@
+from unittest import TestCase, mock
+from restclients_core.exceptions import DataFailureException
+from uw_adsel import AdSelAzureMerge
+from uw_adsel.mergeplan import COHORT, MAJOR
+from uw_adsel.models import CohortMerge, MajorMerge
+
+
+class MergePlanTest(TestCase):
+    def test_plan_merges(self):
+        client = AdSelAzureMerge()
+        plan = client.plan_merges([(1, 2), (1, 3)])
+        self.assertEqual(sorted(plan.conflicts), [
+            (COHORT, 1, 2), (COHORT, 1, 3), (MAJOR, 1, 2), (MAJOR, 1, 3)])
+        self.assertEqual(plan.summary(), {"checks": 4,
+                                          "failed_checks": 0,
+                                          "conflicting": 20,
+                                          "contested": 0,
+                                          "conflict_free": 20})
+        self.assertEqual(plan.conflict_free()[:2], [(COHORT, 1, 2, 2),
+                                                    (COHORT, 1, 2, 4)])
+        self.assertIn((MAJOR, 1, 3, '1_BIOL_00_1_5'), plan.conflict_free())
+
+        merges = plan.merges("Merge scenarios", "javerage")
+        self.assertIsInstance(merges[0], CohortMerge)
+        self.assertEqual(merges[0].to_json(), {
+            'fromWorkspaceId': 1, 'toWorkspaceId': 2,
+            'comments': 'Merge scenarios', 'cohortNbr': 2,
+            'decisionImportUser': 'javerage'})
+        self.assertIsInstance(merges[-1], MajorMerge)
+        self.assertEqual(merges[-1].major_code, '9_SOC_00_1_5')
+
+    def test_contested(self):
+        plan = AdSelAzureMerge().plan_merges([(1, 2), (3, 2), (1, 4)],
+                                             categories=(COHORT,))
+        self.assertEqual(plan.contested(), [(COHORT, 2, 2), (COHORT, 2, 4),
+                                            (COHORT, 2, 6), (COHORT, 2, 8),
+                                            (COHORT, 2, 10)])
+        self.assertEqual(plan.conflict_free(), [
+            (COHORT, 1, 4, cohort) for cohort in (2, 4, 6, 8, 10)])
+
+    def test_check_failure(self):
+        client = AdSelAzureMerge()
+        failure = DataFailureException("/ConflictCheck/Major", 500, "")
+        with mock.patch.object(client, 'check_conflict_major',
+                               side_effect=failure):
+            plan = client.plan_merges([(1, 2)])
+        self.assertEqual(plan.errors, {(MAJOR, 1, 2): failure})
+        self.assertEqual(plan.summary()["failed_checks"], 1)
+        self.assertEqual(len(plan.merges("", "javerage")), 5)
+
+    def test_merge_planned(self):
+        client = AdSelAzureMerge({'merge_workers': 2})
+        plan = client.plan_merges([(1, 2)])
+        result = client.merge_planned(plan, "Merge", "javerage")
+        self.assertEqual(len(result["merges"]), 10)
+        self.assertEqual([response["string_response"]
+                          for response in result["response"]], [""] * 10)
+        self.assertEqual(result["failures"], [])
+
+        failure = DataFailureException("/Merge/Major", 500, "")
+        with mock.patch.object(client, 'merge_major', side_effect=failure):
+            result = client.merge_planned(plan, "Merge", "javerage")
+        self.assertEqual(result["response"][5:], [None] * 5)
+        self.assertEqual([failure["merge"].major_code
+                          for failure in result["failures"]],
+                         ['1_BIOL_00_1_5', '3_ECON_00_1_5', '5_HIST_00_1_5',
+                          '7_PHYS_00_1_5', '9_SOC_00_1_5'])
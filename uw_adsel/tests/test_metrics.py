@@ -0,0 +1,108 @@
+from unittest import TestCase
+from restclients_core.exceptions import DataFailureException
+from uw_adsel import AdSel, AdSelAzureAssign, AdSelAzureMerge
+from uw_adsel.metrics import MetricsCollector, prometheus_text, \
+    url_template, body_size
+from uw_adsel.models import CohortAssignment, Application
+
+
+class MetricsTest(TestCase):
+    def test_url_template(self):
+        self.assertEqual(url_template("/api/v1/applications/0/123/1"),
+                         "/api/v1/applications/{id}/{id}/{id}")
+        self.assertEqual(url_template("/api/v1/activities?netid=javerage"),
+                         "/api/v1/activities")
+        self.assertEqual(url_template("/api/v1/majors/details/0/CSE"),
+                         "/api/v1/majors/details/{id}/{code}")
+        self.assertEqual(
+            url_template("/api/v1/majors/details/0/0_CSE_10?workspaceId=1"),
+            "/api/v1/majors/details/{id}/{code}")
+        self.assertEqual(url_template("/api/v1/majors/details/0"),
+                         "/api/v1/majors/details/{id}")
+
+    def test_body_size(self):
+        self.assertEqual(body_size(None), 0)
+        self.assertEqual(body_size("abc"), 3)
+        self.assertEqual(body_size("café"), 5)
+        self.assertEqual(body_size(b"abcd"), 4)
+
+    def test_get(self):
+        metrics = MetricsCollector()
+        client = AdSel({'metrics': metrics})
+        applications = client.get_all_applications_by_qtr(0, 1)
+        endpoint = "/api/v1/applications/{id}/all/{id}"
+
+        network = metrics.histogram('adsel_request_duration_seconds',
+                                    method="GET", endpoint=endpoint,
+                                    status="200", phase="network")
+        self.assertEqual(network.count, 1)
+        parse = metrics.histogram('adsel_request_duration_seconds',
+                                  method="GET", endpoint=endpoint,
+                                  status="200", phase="parse")
+        self.assertEqual(parse.count, 1)
+        response_size = metrics.histogram('adsel_response_size_bytes',
+                                          method="GET", endpoint=endpoint,
+                                          status="200")
+        self.assertGreater(response_size.sum, 0)
+        rows = metrics.histogram('adsel_hydrate_rows', endpoint=endpoint)
+        self.assertEqual(rows.sum, len(applications))
+
+    def test_major_code_label(self):
+        metrics = MetricsCollector()
+        client = AdSel({'metrics': metrics})
+        for code in ("0_BIOL_1", "0_CHEM_1", "0_CSE_1"):
+            client.get_major_details_by_qtr_major(0, code)
+        network = metrics.histogram(
+            'adsel_request_duration_seconds', method="GET",
+            endpoint="/api/v1/majors/details/{id}/{code}", status="200",
+            phase="network")
+        self.assertEqual(network.count, 3)
+
+    def test_errors_and_posts(self):
+        metrics = MetricsCollector()
+        client = AdSel({'metrics': metrics})
+        with self.assertRaises(DataFailureException):
+            client.get_workspaces_by_qtr(99)
+        self.assertEqual(metrics.histogram(
+            'adsel_request_duration_seconds', method="GET",
+            endpoint="/api/v1/workspaces/{id}", status="404",
+            phase="network").count, 1)
+
+        assign = AdSelAzureAssign({'metrics': metrics})
+        assign.assign_cohorts_bulk(CohortAssignment(
+            applicants=[Application(adsel_id=1, system_key=2,
+                                    application_number=1)],
+            assignment_type="upload", cohort_number=1,
+            override_previous=False, override_protected=False, quarter=0,
+            campus=0, comments="", user="javerage", workspace_id=1))
+        request_size = metrics.histogram('adsel_request_size_bytes',
+                                         method="POST",
+                                         endpoint="/cohort/bulk")
+        self.assertGreater(request_size.sum, 100)
+
+        merge = AdSelAzureMerge({'metrics': metrics})
+        merge.check_conflict_cohort(1, 2)
+        self.assertEqual(metrics.histogram(
+            'adsel_request_size_bytes', method="GET",
+            endpoint="/ConflictCheck/Cohort").count, 1)
+
+    def test_prometheus_text(self):
+        metrics = MetricsCollector()
+        self.assertEqual(prometheus_text(metrics), "")
+        metrics.record_request("GET", '/a/"b"', 200, 0.02, 0.3, 0, 1000)
+        text = prometheus_text(metrics)
+        self.assertIn("# TYPE adsel_request_duration_seconds histogram\n",
+                      text)
+        self.assertIn('adsel_request_duration_seconds_bucket{method="GET",'
+                      'endpoint="/a/\\"b\\"",status="200",phase="network",'
+                      'le="0.01"} 0\n', text)
+        self.assertIn('adsel_request_duration_seconds_bucket{method="GET",'
+                      'endpoint="/a/\\"b\\"",status="200",phase="network",'
+                      'le="0.025"} 1\n', text)
+        self.assertIn('phase="parse",le="+Inf"} 1\n', text)
+        self.assertIn('adsel_response_size_bytes_sum{method="GET",'
+                      'endpoint="/a/\\"b\\"",status="200"} 1000\n', text)
+        self.assertNotIn("adsel_hydrate", text)
+
+        metrics.reset()
+        self.assertEqual(prometheus_text(metrics), "")
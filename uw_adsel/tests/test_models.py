@@ -0,0 +1,83 @@
+import json
+from unittest import TestCase, mock
+from uw_adsel.models import CohortAssignment, MajorAssignment, \
+    PurpleGoldAssignment, DecisionAssignment, Application, \
+    PurpleGoldApplication, DepartmentalDecisionApplication, FieldMap, \
+    FAST_HYDRATE
+
+
+class AssignmentSerializationTest(TestCase):
+    comments = 'Café "quoted" "applicants": [] \\ \n'
+
+    def assertSameBytes(self, assignment):
+        self.assertEqual(assignment.json_bytes(),
+                         json.dumps(assignment.json_data()).encode('utf-8'))
+
+    def details(self):
+        return {'assignment_type': "upload", 'quarter': 20194, 'campus': 1,
+                'comments': self.comments, 'user': "javerage",
+                'workspace_id': 3}
+
+    def test_cohort_assignment(self):
+        applicants = [Application(adsel_id=i, system_key=i * 10,
+                                  application_number=1,
+                                  application_type="Freshman",
+                                  sdb_app_status=16)
+                      for i in range(5)]
+        assignment = CohortAssignment(applicants=applicants,
+                                      cohort_number=2,
+                                      override_previous=True,
+                                      override_protected=False,
+                                      **self.details())
+        self.assertSameBytes(assignment)
+        assignment.applicants = []
+        self.assertSameBytes(assignment)
+        assignment.applicants = applicants[:1]
+        self.assertSameBytes(assignment)
+
+    def test_major_assignment(self):
+        applicants = [Application(adsel_id=i, system_key=i * 10,
+                                  application_number=2)
+                      for i in range(3)]
+        assignment = MajorAssignment(applicants=applicants,
+                                     major_code="0_CSE_1",
+                                     **self.details())
+        self.assertSameBytes(assignment)
+
+    def test_purple_gold_assignment(self):
+        applicants = [PurpleGoldApplication(adsel_id=i, award_amount=500)
+                      for i in range(3)]
+        assignment = PurpleGoldAssignment(applicants=applicants,
+                                          **self.details())
+        self.assertSameBytes(assignment)
+
+    def test_decision_assignment(self):
+        applicants = [DepartmentalDecisionApplication(adsel_id=i,
+                                                      decision_id=4)
+                      for i in range(3)]
+        assignment = DecisionAssignment(applicants=applicants,
+                                        decision_number=1,
+                                        **self.details())
+        self.assertSameBytes(assignment)
+
+
+class FieldMapTest(TestCase):
+    rows = [{"admissionsSelectionId": 1, "systemKey": 10, "status": 3},
+            {"admissionsSelectionId": 2, "systemKey": 20}]
+
+    def hydrate(self):
+        field_map = FieldMap(Application,
+                             {'adsel_id': 'admissionsSelectionId',
+                              'system_key': 'systemKey'},
+                             {'sdb_app_status': 'status'})
+        return [(application.adsel_id, application.system_key,
+                 application.sdb_app_status, application.campus)
+                for application in field_map.hydrate(self.rows)]
+
+    def test_hydrate(self):
+        self.assertTrue(FAST_HYDRATE)
+        expected = [(1, 10, 3, None), (2, 20, None, None)]
+        self.assertEqual(self.hydrate(), expected)
+        # as with a restclients_core whose internals have changed
+        with mock.patch('uw_adsel.models.FAST_HYDRATE', False):
+            self.assertEqual(self.hydrate(), expected)
@@ -0,0 +1,120 @@
+from array import array
+import io
+import json
+from unittest import TestCase
+from uw_adsel import AdSelAzureAssign
+from uw_adsel.models import Application, CohortAssignment
+from uw_adsel.planner import ApplicantColumns, ApplicantBatch, \
+    plan_cohort_assignments, plan_major_assignments
+
+DETAILS = {'assignment_type': "upload", 'quarter': 0, 'campus': 0,
+           'comments': "", 'user': "javerage", 'workspace_id': 1}
+
+CSV = """adsel_id,system_key,application_number,cohort,notes
+1,10,1,3,a
+2,20,1,4,
+3,30,2,3,b
+"""
+
+
+class PlannerTest(TestCase):
+    def test_from_csv(self):
+        columns = ApplicantColumns.from_csv(io.StringIO(CSV), 'cohort')
+        self.assertEqual(len(columns), 3)
+        self.assertEqual(columns.adsel_id, array('q', [1, 2, 3]))
+        self.assertEqual(columns.target, ["3", "4", "3"])
+
+        with self.assertRaisesRegex(ValueError, "no cohort column"):
+            ApplicantColumns.from_csv(io.StringIO("adsel_id,system_key,"
+                                                  "application_number\n"),
+                                      'cohort')
+
+    def test_plan_cohorts(self):
+        columns = ApplicantColumns.from_csv(io.StringIO(CSV), 'cohort')
+        assignments = plan_cohort_assignments(
+            columns, override_previous=True, override_protected=False,
+            **DETAILS)
+        self.assertEqual([a.cohort_number for a in assignments], [3, 4])
+        self.assertIsInstance(assignments[0].applicants, ApplicantBatch)
+        self.assertEqual(assignments[0].applicants.adsel_ids,
+                         array('q', [1, 3]))
+
+        expected = CohortAssignment(
+            applicants=[Application(adsel_id=1, system_key=10,
+                                    application_number=1),
+                        Application(adsel_id=3, system_key=30,
+                                    application_number=2)],
+            cohort_number=3, override_previous=True,
+            override_protected=False, **DETAILS)
+        self.assertEqual(assignments[0].json_data(), expected.json_data())
+        self.assertEqual(assignments[0].json_bytes(), expected.json_bytes())
+
+    def test_plan_majors(self):
+        columns = ApplicantColumns(adsel_id=[1, 2, 3],
+                                   system_key=array('q', [10, 20, 30]),
+                                   application_number=(1, 1, 1),
+                                   target=["CSE", " BIO", "CSE "])
+        assignments = plan_major_assignments(columns, **DETAILS)
+        self.assertEqual([a.major_code for a in assignments], ["CSE", "BIO"])
+        self.assertEqual(len(assignments[0].applicants), 2)
+        body = json.loads(assignments[1].json_bytes().decode('utf-8'))
+        self.assertEqual(body['Applicants'], [{'AdmissionSelectionId': 2,
+                                               'ApplicationNbr': 1,
+                                               'SystemKey': 20}])
+
+    def test_single_target(self):
+        columns = ApplicantColumns([1, 2], [10, 20], [1, 1],
+                                   application_type=["Freshman", ""],
+                                   sdb_app_status=[16, None])
+        assignments = plan_cohort_assignments(columns, cohort_number=5,
+                                              **DETAILS)
+        self.assertEqual(len(assignments), 1)
+        applicants = list(assignments[0].applicants)
+        self.assertEqual(applicants[0].application_type, "Freshman")
+        self.assertEqual(applicants[0].sdb_app_status, 16)
+        self.assertIsNone(applicants[1].application_type)
+        self.assertIsNone(applicants[1].sdb_app_status)
+
+        with self.assertRaises(ValueError):
+            plan_cohort_assignments(columns, **DETAILS)
+
+    def test_validation(self):
+        with self.assertRaises(ValueError) as cm:
+            ApplicantColumns(adsel_id=[1, "x", 1, 4],
+                             system_key=[10, 20, 30],
+                             application_number=[1, 1, 1, None],
+                             target=[1, 2, "", 3])
+        message = str(cm.exception)
+        self.assertIn("row 1: adsel_id 'x' is not an integer", message)
+        self.assertIn("row 3: application_number None", message)
+        self.assertIn("system_key has 3 rows, expected 4", message)
+        self.assertIn("row 2: missing target", message)
+        self.assertIn("rows 0, 2: duplicate adsel_id 1", message)
+
+        columns = ApplicantColumns([1, 2], [10, 20], [1, 1],
+                                   target=["3", "three"])
+        with self.assertRaisesRegex(ValueError, "rows 1: invalid target"):
+            plan_cohort_assignments(columns, **DETAILS)
+
+        # e.g. a float column from a data frame
+        with self.assertRaises(ValueError) as cm:
+            ApplicantColumns([1.9, 2.5], [True, 3], [1, 1])
+        message = str(cm.exception)
+        self.assertIn("row 0: adsel_id 1.9 is not an integer", message)
+        self.assertIn("row 1: adsel_id 2.5 is not an integer", message)
+        self.assertIn("row 0: system_key True is not an integer", message)
+        self.assertEqual(
+            list(ApplicantColumns([1.0, 2.0], [10, 20], [1, 1]).adsel_id),
+            [1, 2])
+
+    def test_chunked_submit(self):
+        columns = ApplicantColumns(list(range(1, 6)), list(range(10, 60, 10)),
+                                   [1] * 5)
+        assignment = plan_cohort_assignments(
+            columns, cohort_number=1, override_previous=True,
+            override_protected=False, **DETAILS)[0]
+        client = AdSelAzureAssign({'assignment_chunk_size': 2})
+        result = client.assign_cohorts_bulk(assignment)
+        self.assertEqual(len(result['request']), 3)
+        self.assertEqual([len(request['applicants'])
+                          for request in result['request']], [2, 2, 1])
@@ -0,0 +1,127 @@
+from unittest import TestCase, mock
+from restclients_core.exceptions import DataFailureException
+from restclients_core.models import MockHTTP
+from uw_adsel import AdSel, AdSelAzureAssign
+from uw_adsel.exceptions import CircuitOpenException
+from uw_adsel.metrics import MetricsCollector, prometheus_text
+from uw_adsel.resilience import RetryPolicy, CircuitBreaker, \
+    CircuitBreakers, CLOSED, HALF_OPEN, OPEN
+
+
+def response(status, data=b"[]", headers=None):
+    mock_response = MockHTTP()
+    mock_response.status = status
+    mock_response.data = data
+    mock_response.headers = headers
+    return mock_response
+
+
+class RetryPolicyTest(TestCase):
+    def test_delay(self):
+        policy = RetryPolicy(retries=3, backoff=0.5, max_backoff=1.5)
+        for attempt in range(5):
+            delay = policy.delay(attempt)
+            self.assertTrue(0 <= delay <= min(1.5, 0.5 * 2 ** attempt))
+        self.assertEqual(policy.delay(0, response(429, headers={
+            "Retry-After": "1"})), 1.0)
+        self.assertEqual(policy.delay(0, response(429, headers={
+            "Retry-After": "60"})), 1.5)
+
+    def test_should_retry(self):
+        policy = RetryPolicy(retries=2)
+        self.assertTrue(policy.should_retry(0, 503))
+        self.assertTrue(policy.should_retry(1, 0))
+        self.assertFalse(policy.should_retry(2, 503))
+        self.assertFalse(policy.should_retry(0, 404))
+
+
+class CircuitBreakerTest(TestCase):
+    @mock.patch('uw_adsel.resilience.time.monotonic')
+    def test_states(self, monotonic):
+        monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        self.assertTrue(breaker.allow_call())
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow_call())
+
+        monotonic.return_value = 110
+        self.assertTrue(breaker.allow_call())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow_call())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        monotonic.return_value = 120
+        self.assertTrue(breaker.allow_call())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow_call())
+
+
+class ClientResilienceTest(TestCase):
+    def test_get_retried(self):
+        metrics = MetricsCollector()
+        client = AdSel({'retry': RetryPolicy(retries=2, backoff=0),
+                        'metrics': metrics})
+        responses = [response(503), response(200, b'[]')]
+        with mock.patch.object(client.DAO, 'getURL',
+                               side_effect=responses) as get_url:
+            self.assertEqual(client.get_all_applications_by_qtr(0, 1), [])
+        self.assertEqual(get_url.call_count, 2)
+        self.assertEqual(metrics.value(
+            'adsel_retries_total', method="GET",
+            endpoint="/api/v1/applications/{id}/all/{id}", status="503"), 1)
+
+        failure = DataFailureException("/api/v1/academicqtr", 0, "timeout")
+        with mock.patch.object(client.DAO, 'getURL',
+                               side_effect=failure) as get_url:
+            with self.assertRaises(DataFailureException):
+                client.get_quarters()
+        self.assertEqual(get_url.call_count, 3)
+
+    def test_post_not_retried(self):
+        client = AdSelAzureAssign({'retry': RetryPolicy(backoff=0)})
+        with mock.patch.object(client.DAO, 'postURL',
+                               return_value=response(503)) as post_url:
+            with self.assertRaises(DataFailureException):
+                client._post_body("/cohort/bulk", "{}")
+        self.assertEqual(post_url.call_count, 1)
+
+    def test_circuit_breaker(self):
+        metrics = MetricsCollector()
+        breakers = CircuitBreakers(failure_threshold=2, reset_timeout=60)
+        config = {'circuit_breakers': breakers, 'metrics': metrics}
+        client = AdSel(config)
+        with mock.patch.object(client.DAO, 'getURL',
+                               return_value=response(500)) as get_url:
+            for _ in range(2):
+                with self.assertRaises(DataFailureException):
+                    client.get_quarters()
+            with self.assertRaises(CircuitOpenException):
+                AdSel(config).get_quarters()
+        self.assertEqual(get_url.call_count, 2)
+        self.assertEqual(breakers.states(), {'adsel': OPEN})
+        self.assertEqual(metrics.value('adsel_circuit_state',
+                                       service="adsel"), 2)
+        self.assertEqual(metrics.value('adsel_circuit_rejected_total',
+                                       service="adsel"), 1)
+        self.assertIn('adsel_circuit_state{service="adsel"} 2\n',
+                      prometheus_text(metrics))
+
+        # other services have their own breaker
+        AdSelAzureAssign(config)._post_body("/cohort/bulk", "{}")
+        self.assertEqual(breakers.states(), {'adsel': OPEN,
+                                             'adsel_azure_assign': CLOSED})
+
+    def test_activities_failures_raise(self):
+        client = AdSel()
+        self.assertEqual(client.get_filtered_activities(netid="foo"), [])
+        with mock.patch.object(client.DAO, 'getURL',
+                               return_value=response(503)):
+            with self.assertRaises(DataFailureException):
+                client.get_filtered_activities(netid="javerage")
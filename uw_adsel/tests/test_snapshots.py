@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase, mock
+from uw_adsel import AdSel
+from uw_adsel.models import Activity, Application
+from uw_adsel.snapshots import SnapshotStore, FULL, DELTA, UNCHANGED
+from uw_adsel.tests import cohort_assignment
+
+
+def activity(import_id, user="javerage", cohort=2, minutes_ago=0):
+    return Activity(
+        decision_import_id=import_id, user=user, cohort_number=cohort,
+        major_program_code="", assignment_date=datetime.now(
+            timezone.utc) - timedelta(minutes=minutes_ago))
+
+
+def assignment(system_keys, cohort=2):
+    return cohort_assignment([Application(adsel_id=1, system_key=system_key,
+                                          application_number=1)
+                              for system_key in system_keys],
+                             cohort_number=cohort)
+
+
+class SnapshotStoreTest(TestCase):
+    def setUp(self):
+        self.client = AdSel()
+        self.store = SnapshotStore(self.client)
+        self.activities = []
+        patcher = mock.patch.object(
+            self.client, 'iter_activities',
+            side_effect=lambda **filters: iter(self.activities))
+        self.iter_activities = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_delta_sync(self):
+        applications = self.store.get_applications(0, 1)
+        self.assertEqual(len(applications), 4)
+        self.assertEqual(self.store.sync(0, 1)["mode"], UNCHANGED)
+        self.assertEqual(self.iter_activities.call_args[1]["workspace_id"],
+                         1)
+
+        # our own assignment is re-read through SystemKeys
+        self.store.record_assignment(assignment([456340, 123]))
+        self.activities = [activity(1)]
+        with mock.patch.object(self.client, 'get_all_applications_by_qtr',
+                               side_effect=AssertionError) as full:
+            result = self.store.sync(0, 1)
+        self.assertEqual(result, {"mode": DELTA, "activities": 1,
+                                  "refetched": 2, "removed": 1})
+        self.assertFalse(full.called)
+        applications = self.store.get_applications(0, 1)
+        self.assertEqual(len([application for application in applications
+                              if application.system_key == 456340]), 2)
+
+        # an activity already applied is not applied again
+        self.assertEqual(self.store.sync(0, 1)["mode"], UNCHANGED)
+
+    def test_unexplained_activity(self):
+        self.store.sync(0, 1)
+        self.store.record_assignment(assignment([456340]))
+        self.activities = [activity(1), activity(2, user="jinter")]
+        self.assertEqual(self.store.sync(0, 1)["mode"], FULL)
+        self.assertEqual(self.store.sync(0, 1)["mode"], UNCHANGED)
+
+        # activities from before a full read are already reflected in it
+        self.activities = [activity(3, user="jinter", minutes_ago=1)]
+        self.assertEqual(self.store.sync(0, 1)["mode"], UNCHANGED)
+
+    def test_pending_assignment(self):
+        self.store.sync(0, 1)
+        self.store.record_assignment(assignment([456340]))
+        later = assignment([97508], cohort=3)
+        self.store.record_assignment(later)
+        self.activities = [activity(1)]
+        self.assertEqual(self.store.sync(0, 1)["refetched"], 2)
+        self.assertEqual(self.store._snapshot(0, 1).pending, [later])
+
+    def test_periodic_full_sync(self):
+        store = SnapshotStore(self.client, full_sync_interval=0)
+        self.assertEqual(store.sync(0, 1)["mode"], FULL)
+        self.assertEqual(store.sync(0, 1)["mode"], FULL)
+        self.assertEqual(self.store.sync(0, 1, full=True)["mode"], FULL)
+
+
+class SnapshotStoreClientTest(TestCase):
+    def test_sync(self):
+        # no activities match the filters, which the mock answers with 404
+        store = SnapshotStore(AdSel())
+        self.assertEqual(store.sync(0, 1)["mode"], FULL)
+        self.assertEqual(store.sync(0, 1), {"mode": UNCHANGED,
+                                            "activities": 0,
+                                            "refetched": 0, "removed": 0})
+        self.assertEqual(len(store.get_applications(0, 1)), 4)